@@ -0,0 +1,7 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
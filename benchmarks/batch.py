@@ -0,0 +1,50 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+
+from q2_vizard import batch
+
+from .common import make_dataframe
+
+
+def _worker_counts():
+    n_cpus = os.cpu_count() or 1
+    counts = [1, 2, 4, 8, 16, 32, 64]
+    return sorted({n for n in counts if n < n_cpus} | {n_cpus})
+
+
+class BatchScaling:
+    """
+    A boxplot of every numeric column grouped by every categorical column
+    (100 plots of 10000 rows), rendered by 1 up to (all) N worker processes.
+    """
+    params = _worker_counts()
+    param_names = ['n_jobs']
+    timeout = 600
+
+    def setup(self, n_jobs):
+        from qiime2 import Metadata
+
+        self.md = Metadata(make_dataframe(10000, n_numeric=20,
+                                          n_categorical=5))
+        self.plots = [
+            {'visualizer': 'boxplot', 'name': f'numeric{i}-categorical{j}',
+             'distribution_measure': f'numeric{i}',
+             'group_by': f'categorical{j}'}
+            for i in range(20) for j in range(5)
+        ]
+        self.output_dir = tempfile.mkdtemp()
+
+    def teardown(self, n_jobs):
+        shutil.rmtree(self.output_dir)
+
+    def time_batch(self, n_jobs):
+        batch(self.output_dir, self.md, self.plots, n_jobs=n_jobs)
@@ -0,0 +1,54 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from q2_vizard import heatmap, boxplot, scatterplot_2d, lineplot
+from q2_vizard._cache import _clear_metadata_cache, _METADATA_CACHE_ENV_VAR
+
+from .common import make_dataframe
+
+
+class ReportPipeline:
+    """
+    The same Metadata visualized by every visualizer, twice over (as a
+    reporting pipeline re-run would), with the metadata cache off or on.
+    """
+    params = ([10000, 100000], ['off', 'on'])
+    param_names = ['n_rows', 'metadata_cache']
+    timeout = 600
+
+    def setup(self, n_rows, metadata_cache):
+        from qiime2 import Metadata
+
+        self.md = Metadata(make_dataframe(n_rows))
+        self.output_dir = tempfile.mkdtemp()
+
+        size = '8' if metadata_cache == 'on' else '0'
+        self.env = mock.patch.dict(os.environ,
+                                   {_METADATA_CACHE_ENV_VAR: size})
+        self.env.start()
+
+    def teardown(self, n_rows, metadata_cache):
+        self.env.stop()
+        _clear_metadata_cache()
+        shutil.rmtree(self.output_dir)
+
+    def time_pipeline(self, n_rows, metadata_cache):
+        for _ in range(2):
+            scatterplot_2d(self.output_dir, self.md)
+            boxplot(self.output_dir, self.md,
+                    distribution_measure='numeric0', group_by='categorical0')
+            lineplot(self.output_dir, self.md, x_measure='numeric0',
+                     y_measure='numeric1', group_by='categorical0',
+                     replicate_method='mean')
+            heatmap(self.output_dir, self.md, x_measure='categorical0',
+                    y_measure='categorical1', gradient_measure='numeric0')
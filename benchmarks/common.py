@@ -0,0 +1,21 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+from q2_vizard._synthetic import _synthetic_dataframe
+
+
+def make_dataframe(n_rows, n_numeric=4, n_categorical=2, n_groups=5,
+                   seed=0, **kwargs):
+    """
+    Build a metadata-shaped DataFrame of random numeric and categorical
+    columns, indexed by sample ID (see `_synthetic_dataframe` for the other
+    `kwargs`).
+    """
+    return _synthetic_dataframe(n_rows, n_numeric=n_numeric,
+                                n_categorical=n_categorical,
+                                cardinality=n_groups, seed=seed, **kwargs)
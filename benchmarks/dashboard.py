@@ -0,0 +1,55 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+
+from q2_vizard import batch, dashboard
+
+from .common import make_dataframe
+
+
+PLOTS = [
+    {'visualizer': 'scatterplot_2d', 'name': 'scatterplot'},
+    {'visualizer': 'boxplot', 'name': 'boxplot',
+     'distribution_measure': 'numeric0', 'group_by': 'categorical0'},
+    {'visualizer': 'lineplot', 'name': 'lineplot', 'x_measure': 'numeric0',
+     'y_measure': 'numeric1', 'group_by': 'categorical0'}
+]
+
+
+class DashboardSize:
+    """
+    Total size of a scatterplot, boxplot and lineplot of the same metadata,
+    rendered as separate visualizations or as a single dashboard.
+    """
+    params = ([1000, 100000], ['separate', 'dashboard'])
+    param_names = ['n_rows', 'layout']
+    unit = 'bytes'
+    timeout = 300
+
+    def setup(self, n_rows, layout):
+        from qiime2 import Metadata
+
+        self.md = Metadata(make_dataframe(n_rows))
+        self.output_dir = tempfile.mkdtemp()
+
+    def teardown(self, n_rows, layout):
+        shutil.rmtree(self.output_dir)
+
+    def track_html_size(self, n_rows, layout):
+        if layout == 'dashboard':
+            dashboard(self.output_dir, self.md, PLOTS)
+            return os.path.getsize(
+                os.path.join(self.output_dir, 'index.html'))
+
+        batch(self.output_dir, self.md, PLOTS)
+        return sum(os.path.getsize(os.path.join(self.output_dir, plot['name'],
+                                                'index.html'))
+                   for plot in PLOTS)
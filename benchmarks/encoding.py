@@ -0,0 +1,112 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import shutil
+import zipfile
+import tempfile
+
+from q2_vizard import scatterplot_2d
+
+from .common import make_dataframe
+
+
+ENCODINGS = ['records', 'columns', 'gzip', 'arrow']
+
+
+class DataEncoding:
+    """
+    Size of, and time to write, a scatterplot of every metadata column for
+    each `data_encoding` of the embedded metadata.
+    """
+    params = ([1000, 100000], [10, 100], ENCODINGS)
+    param_names = ['n_rows', 'n_columns', 'data_encoding']
+    timeout = 300
+
+    def setup(self, n_rows, n_columns, data_encoding):
+        from qiime2 import Metadata
+
+        n_categorical = n_columns // 2
+        self.md = Metadata(make_dataframe(
+            n_rows, n_numeric=n_columns - n_categorical,
+            n_categorical=n_categorical))
+        self.output_dir = tempfile.mkdtemp()
+        self.index_fp = os.path.join(self.output_dir, 'index.html')
+
+    def teardown(self, n_rows, n_columns, data_encoding):
+        shutil.rmtree(self.output_dir)
+
+    def _render(self, data_encoding):
+        scatterplot_2d(self.output_dir, self.md, data_encoding=data_encoding)
+
+    def time_render(self, n_rows, n_columns, data_encoding):
+        self._render(data_encoding)
+
+    def track_html_size(self, n_rows, n_columns, data_encoding):
+        self._render(data_encoding)
+        return os.path.getsize(self.index_fp)
+
+    track_html_size.unit = 'bytes'
+
+    def track_archived_size(self, n_rows, n_columns, data_encoding):
+        # visualizations are stored deflated inside the .qzv zip archive
+        self._render(data_encoding)
+        zip_fp = os.path.join(self.output_dir, 'viz.zip')
+        with zipfile.ZipFile(zip_fp, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.write(self.index_fp, 'index.html')
+        return os.path.getsize(zip_fp)
+
+    track_archived_size.unit = 'bytes'
+
+
+class TimeToFirstRender:
+    """
+    Milliseconds from navigating to a rendered scatterplot until its marks
+    are drawn, which includes parsing and decoding the embedded data.
+
+    This needs selenium and a headless chrome (and network access for the
+    `arrow` decoder), and is skipped when they aren't available.
+    """
+    params = ([1000, 100000], ENCODINGS)
+    param_names = ['n_rows', 'data_encoding']
+    unit = 'milliseconds'
+    timeout = 600
+
+    def setup(self, n_rows, data_encoding):
+        try:
+            from selenium import webdriver
+            from selenium.webdriver.chrome.options import Options
+
+            options = Options()
+            options.add_argument('-headless')
+            self.driver = webdriver.Chrome(options=options)
+        except Exception:
+            raise NotImplementedError('headless chrome is not available')
+
+        from qiime2 import Metadata
+
+        self.output_dir = tempfile.mkdtemp()
+        scatterplot_2d(self.output_dir, Metadata(make_dataframe(n_rows)),
+                       data_encoding=data_encoding)
+
+    def teardown(self, n_rows, data_encoding):
+        self.driver.quit()
+        shutil.rmtree(self.output_dir)
+
+    def track_time_to_first_render(self, n_rows, data_encoding):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        index_fp = os.path.join(self.output_dir, 'index.html')
+        self.driver.get(f'file://{index_fp}')
+        # the larger plots are drawn on a canvas by the `auto` renderer
+        WebDriverWait(self.driver, self.timeout).until(
+            EC.presence_of_element_located(
+                (By.CSS_SELECTOR, '#viz svg.marks, #viz canvas.marks')))
+        return self.driver.execute_script('return performance.now();')
@@ -0,0 +1,63 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from q2_vizard import lineplot
+
+
+def make_longitudinal_dataframe(n_subjects, n_timepoints, n_replicates=1,
+                                seed=0):
+    """
+    Build a DataFrame of `n_subjects` subjects each sampled at
+    `n_timepoints` timepoints, with `n_replicates` samples per timepoint.
+    """
+    rng = np.random.default_rng(seed)
+    n_rows = n_subjects * n_timepoints * n_replicates
+
+    subjects = np.array([f'subject{i}' for i in range(n_subjects)],
+                        dtype=object)
+    index = pd.Index([f'sample{i}' for i in range(n_rows)], name='id')
+
+    return pd.DataFrame({
+        'subject': np.repeat(subjects, n_timepoints * n_replicates),
+        'timepoint': np.tile(
+            np.repeat(np.arange(n_timepoints, dtype=float), n_replicates),
+            n_subjects),
+        'measure': rng.normal(size=n_rows)
+    }, index=index)
+
+
+class LineplotGroupScaling:
+    """
+    `lineplot` grouped by subject, for an increasing number of subjects at
+    40 timepoints each.
+    """
+    params = ([10, 100, 1000, 5000], ['none', 'median', 'mean'])
+    param_names = ['n_groups', 'replicate_method']
+    timeout = 300
+
+    def setup(self, n_groups, replicate_method):
+        from qiime2 import Metadata
+
+        n_replicates = 1 if replicate_method == 'none' else 3
+        self.md = Metadata(make_longitudinal_dataframe(
+            n_groups, n_timepoints=40, n_replicates=n_replicates))
+        self.output_dir = tempfile.mkdtemp()
+
+    def teardown(self, n_groups, replicate_method):
+        shutil.rmtree(self.output_dir)
+
+    def time_lineplot(self, n_groups, replicate_method):
+        lineplot(self.output_dir, self.md, x_measure='timepoint',
+                 y_measure='measure', group_by='subject',
+                 replicate_method=replicate_method)
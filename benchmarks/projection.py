@@ -0,0 +1,61 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+
+from q2_vizard import heatmap, boxplot, scatterplot_2d, lineplot
+
+from .common import make_dataframe
+
+
+class HTMLSizeByColumnCount:
+    """
+    Size of the rendered index.html for 1000 rows, as the total number of
+    metadata columns grows. Only the columns a visualization uses should be
+    embedded, so the size should stay (almost) flat.
+    """
+    params = ([10, 100, 300, 1000],
+              ['heatmap', 'boxplot', 'scatterplot_2d', 'lineplot'])
+    param_names = ['n_columns', 'visualizer']
+    unit = 'bytes'
+    timeout = 300
+
+    def setup(self, n_columns, visualizer):
+        from qiime2 import Metadata
+
+        n_categorical = n_columns // 2
+        self.md = Metadata(make_dataframe(
+            1000, n_numeric=n_columns - n_categorical,
+            n_categorical=n_categorical))
+        self.output_dir = tempfile.mkdtemp()
+
+    def teardown(self, n_columns, visualizer):
+        shutil.rmtree(self.output_dir)
+
+    def _render(self, visualizer):
+        if visualizer == 'heatmap':
+            heatmap(self.output_dir, self.md, x_measure='categorical0',
+                    y_measure='categorical1', gradient_measure='numeric0')
+        elif visualizer == 'boxplot':
+            boxplot(self.output_dir, self.md,
+                    distribution_measure='numeric0', group_by='categorical0')
+        elif visualizer == 'scatterplot_2d':
+            scatterplot_2d(self.output_dir, self.md,
+                           x_measure='numeric0', y_measure='numeric1',
+                           color_by='categorical0',
+                           columns=['numeric2', 'categorical1'])
+        elif visualizer == 'lineplot':
+            lineplot(self.output_dir, self.md, x_measure='numeric0',
+                     y_measure='numeric1', group_by='categorical0',
+                     replicate_method='mean', columns=['numeric2'])
+
+    def track_html_size(self, n_columns, visualizer):
+        self._render(visualizer)
+        return os.path.getsize(os.path.join(self.output_dir, 'index.html'))
@@ -0,0 +1,99 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import json
+import shutil
+import tempfile
+
+import q2_vizard
+from q2_vizard._util import _SpecTemplate, _json_replace
+from q2_vizard._render import (_render_html, _clear_asset_cache,
+                               _load_assets)
+from q2_vizard._vendor import _runtime_scripts
+
+from .common import make_dataframe
+
+
+def _render_round_trip(output_dir, index, json_obj, metadata, **values):
+    # the DataFrame -> JSON -> Python objects -> JSON rendering that
+    # `_render_html` replaced, kept here as the point of comparison
+    metadata_obj = json.loads(metadata.to_json(orient='records'))
+    full_spec = _json_replace(json_obj, metadata=metadata_obj, **values)
+
+    with open(os.path.join(output_dir, 'index.html'), 'w') as fh:
+        spec_string = json.dumps(full_spec)
+        fh.write(index.render(spec=spec_string, renderer='svg',
+                              runtime=_runtime_scripts(output_dir)))
+
+
+class SpecRendering:
+    """
+    Round-trip vs. single-pass rendering of a heatmap spec.
+    """
+    params = ([10000, 100000, 200000], ['round_trip', 'single_pass'])
+    param_names = ['n_rows', 'method']
+    timeout = 300
+
+    def setup(self, n_rows, method):
+        self.md = make_dataframe(n_rows).reset_index()
+        # the template includes the shared `common/` assets, so it's loaded
+        # from the same environment as the visualizers' templates
+        self.index, _ = _load_assets('heatmap')
+
+        spec_fp = os.path.join(os.path.dirname(q2_vizard.__file__),
+                               'assets', 'heatmap', 'spec.json')
+        with open(spec_fp) as fh:
+            self.json_obj = json.load(fh)
+
+        if method == 'round_trip':
+            self.render, self.spec = _render_round_trip, self.json_obj
+        else:
+            self.render, self.spec = _render_html, _SpecTemplate(self.json_obj)
+
+    def _render(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            self.render(output_dir, self.index, self.spec,
+                        metadata=self.md, md_ids='id',
+                        x_measure='categorical0', y_measure='categorical1',
+                        gradient_measure='numeric0', title=None,
+                        subtitle=' ')
+
+    def time_render(self, n_rows, method):
+        self._render()
+
+    def peakmem_render(self, n_rows, method):
+        self._render()
+
+
+class RepeatedRenders:
+    """
+    Many small heatmaps rendered in one process, with the asset cache either
+    cleared before every render or left warm.
+    """
+    params = ['cold', 'warm']
+    param_names = ['asset_cache']
+    n_renders = 100
+
+    def setup(self, asset_cache):
+        from qiime2 import Metadata
+
+        self.md = Metadata(make_dataframe(20))
+        self.output_dir = tempfile.mkdtemp()
+
+    def teardown(self, asset_cache):
+        shutil.rmtree(self.output_dir)
+
+    def time_heatmap(self, asset_cache):
+        for _ in range(self.n_renders):
+            if asset_cache == 'cold':
+                _clear_asset_cache()
+            q2_vizard.heatmap(self.output_dir, self.md,
+                              x_measure='categorical0',
+                              y_measure='categorical1',
+                              gradient_measure='numeric0')
@@ -0,0 +1,128 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from q2_vizard import heatmap, boxplot, scatterplot_2d, lineplot
+from q2_vizard._plan import _MAX_MARKS_ENV_VAR, _MAX_EMBEDDED_BYTES_ENV_VAR
+
+from .common import make_dataframe
+
+
+N_ROWS = [1000, 10000, 100000, 1000000]
+N_COLUMNS = [10, 100, 1000]
+
+# metadata with more cells than this isn't built, since it wouldn't fit in
+# the memory of most machines the suite is run on (i.e. 1M rows x 1000
+# columns is skipped)
+MAX_CELLS = 10 ** 8
+
+
+class _VisualizerScaling:
+    """
+    Time, peak memory and output size of one `visualizer`, rendering
+    metadata of `n_rows` rows and `n_columns` columns (half numeric, half
+    categorical) with its `measures`, for each value of its last parameter.
+
+    The render budgets are lifted, so that every size is rendered as asked
+    rather than aggregated, downsampled or moved to sidecar files.
+    """
+    param_names = ['n_rows', 'n_columns']
+    timeout = 1200
+
+    visualizer = None
+    measures = {}
+
+    def setup(self, n_rows, n_columns, option):
+        from qiime2 import Metadata
+
+        if n_rows * n_columns > MAX_CELLS:
+            raise NotImplementedError
+
+        n_categorical = n_columns // 2
+        self.md = Metadata(self.make_dataframe(
+            n_rows, n_numeric=n_columns - n_categorical,
+            n_categorical=n_categorical, option=option))
+        self.output_dir = tempfile.mkdtemp()
+
+        self.env = mock.patch.dict(os.environ,
+                                   {_MAX_MARKS_ENV_VAR: '0',
+                                    _MAX_EMBEDDED_BYTES_ENV_VAR: '0'})
+        self.env.start()
+
+    def teardown(self, n_rows, n_columns, option):
+        self.env.stop()
+        shutil.rmtree(self.output_dir)
+
+    def make_dataframe(self, n_rows, n_numeric, n_categorical, option):
+        return make_dataframe(n_rows, n_numeric=n_numeric,
+                              n_categorical=n_categorical)
+
+    def render(self, option):
+        self.visualizer(self.output_dir, self.md, **self.measures,
+                        **{self.param_names[-1]: option})
+
+    def time_render(self, n_rows, n_columns, option):
+        self.render(option)
+
+    def peakmem_render(self, n_rows, n_columns, option):
+        self.render(option)
+
+    def track_html_size(self, n_rows, n_columns, option):
+        # every file of the visualization, e.g. any vendored runtime too
+        self.render(option)
+        return sum(os.path.getsize(os.path.join(dirpath, filename))
+                   for dirpath, _, filenames in os.walk(self.output_dir)
+                   for filename in filenames)
+
+    track_html_size.unit = 'bytes'
+
+
+class HeatmapScaling(_VisualizerScaling):
+    params = (N_ROWS, N_COLUMNS, ['none', 'mean'])
+    param_names = _VisualizerScaling.param_names + ['aggregate_method']
+
+    visualizer = staticmethod(heatmap)
+    measures = {'x_measure': 'categorical0', 'y_measure': 'categorical1',
+                'gradient_measure': 'numeric0'}
+
+
+class ScatterplotScaling(_VisualizerScaling):
+    params = (N_ROWS, N_COLUMNS, ['categorical0', None])
+    param_names = _VisualizerScaling.param_names + ['color_by']
+
+    visualizer = staticmethod(scatterplot_2d)
+    measures = {'x_measure': 'numeric0', 'y_measure': 'numeric1'}
+
+
+class LineplotScaling(_VisualizerScaling):
+    params = (N_ROWS, N_COLUMNS, ['none', 'median', 'mean'])
+    param_names = _VisualizerScaling.param_names + ['replicate_method']
+
+    visualizer = staticmethod(lineplot)
+    measures = {'x_measure': 'timepoint', 'y_measure': 'numeric1',
+                'group_by': 'categorical0'}
+
+    def make_dataframe(self, n_rows, n_numeric, n_categorical, option):
+        # three samples at each timepoint of a group, for the averaging
+        # methods to average
+        return make_dataframe(n_rows, n_numeric=n_numeric,
+                              n_categorical=n_categorical,
+                              replicates=1 if option == 'none' else 3)
+
+
+class BoxplotScaling(_VisualizerScaling):
+    params = (N_ROWS, N_COLUMNS, ['tukeys_iqr', 'percentile', 'minmax'])
+    param_names = _VisualizerScaling.param_names + ['whisker_range']
+
+    visualizer = staticmethod(boxplot)
+    measures = {'distribution_measure': 'numeric0',
+                'group_by': 'categorical0'}
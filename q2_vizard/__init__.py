@@ -12,8 +12,11 @@ from q2_vizard.scatterplot import scatterplot_2d
 from q2_vizard.heatmap import heatmap
 from q2_vizard.lineplot import lineplot
 from q2_vizard.boxplot import boxplot
+from q2_vizard.batch import batch
+from q2_vizard.dashboard import dashboard
 
 __version__ = get_versions()['version']
 del get_versions
 
-__all__ = ['heatmap', 'scatterplot_2d', 'lineplot', 'boxplot']
+__all__ = ['heatmap', 'scatterplot_2d', 'lineplot', 'boxplot', 'batch',
+           'dashboard']
@@ -0,0 +1,175 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import io
+import os
+import weakref
+import contextlib
+import collections
+
+from ._instrument import _phase
+
+
+# the number of Metadata instances whose DataFrame (and serialized data) is
+# kept around between visualizer calls. Unset or `0` disables the cache.
+_METADATA_CACHE_ENV_VAR = 'Q2_VIZARD_METADATA_CACHE_SIZE'
+
+
+# the least number of Metadata that are cached regardless of the
+# environment variable, which is raised by `_metadata_cache_enabled`
+_MIN_CACHE_SIZE = 0
+
+
+def _cache_size():
+    try:
+        size = int(os.environ.get(_METADATA_CACHE_ENV_VAR, '0') or 0)
+    except ValueError:
+        raise ValueError(f'`{_METADATA_CACHE_ENV_VAR}` must be a whole'
+                         ' number of Metadata to cache.')
+    return max(size, _MIN_CACHE_SIZE, 0)
+
+
+@contextlib.contextmanager
+def _metadata_cache_enabled(size=1):
+    """
+    Cache at least `size` Metadata while in this context, even if the
+    metadata cache is otherwise disabled.
+    """
+    global _MIN_CACHE_SIZE
+
+    previous = _MIN_CACHE_SIZE
+    _MIN_CACHE_SIZE = max(previous, size)
+    try:
+        yield
+    finally:
+        _MIN_CACHE_SIZE = previous
+        if not _cache_size():
+            _clear_metadata_cache()
+
+
+class _CacheEntry:
+    """
+    The reset DataFrame of one Metadata, and every serialized form of it
+    (keyed by column subset and data encoding) that has been written.
+    """
+    def __init__(self, df):
+        self.df = df
+        self.serialized = {}
+
+
+# id(metadata) -> (weakref to metadata, _CacheEntry), least recently used
+# first. Entries are dropped as soon as their Metadata is garbage collected.
+_METADATA_CACHE = collections.OrderedDict()
+
+# id(frame) -> (weakref to frame, _CacheEntry, columns, length) for every
+# DataFrame handed out from (or projected from) a cached entry, which is
+# what lets `_write_cached` recognize them later on
+_CACHED_FRAMES = {}
+
+
+def _evict(key, ref):
+    cached = _METADATA_CACHE.get(key)
+    if cached is not None and cached[0] is ref:
+        del _METADATA_CACHE[key]
+
+
+def _forget_frame(key, ref):
+    cached = _CACHED_FRAMES.get(key)
+    if cached is not None and cached[0] is ref:
+        del _CACHED_FRAMES[key]
+
+
+def _register_frame(df, entry):
+    key = id(df)
+    ref = weakref.ref(df, lambda ref: _forget_frame(key, ref))
+    _CACHED_FRAMES[key] = (ref, entry, tuple(df.columns), len(df))
+
+
+def _cached_entry(frame):
+    """
+    Return the `_CacheEntry` that `frame` was handed out from, as long as
+    its columns haven't changed since, otherwise None.
+    """
+    cached = _CACHED_FRAMES.get(id(frame))
+    if cached is None:
+        return None
+
+    ref, entry, columns, length = cached
+    if ref() is not frame \
+            or tuple(frame.columns) != columns or len(frame) != length:
+        return None
+    return entry
+
+
+def _metadata_dataframe(metadata):
+    """
+    Return `metadata.to_dataframe().reset_index()`.
+
+    When the cache is enabled (see `_METADATA_CACHE_ENV_VAR`), the DataFrame
+    is built once per Metadata instance and a shallow copy of it is returned
+    on each call. Columns may be added to or removed from the copy, but its
+    values must never be modified in place.
+    """
+    maxsize = _cache_size()
+    if not maxsize:
+        _clear_metadata_cache()
+        with _phase('to_dataframe'):
+            return metadata.to_dataframe().reset_index()
+
+    key = id(metadata)
+    cached = _METADATA_CACHE.get(key)
+    if cached is not None and cached[0]() is metadata:
+        _METADATA_CACHE.move_to_end(key)
+        entry = cached[1]
+    else:
+        ref = weakref.ref(metadata, lambda ref: _evict(key, ref))
+        with _phase('to_dataframe'):
+            entry = _CacheEntry(metadata.to_dataframe().reset_index())
+        _METADATA_CACHE[key] = (ref, entry)
+
+    while len(_METADATA_CACHE) > maxsize:
+        _METADATA_CACHE.popitem(last=False)
+
+    df = entry.df.copy(deep=False)
+    _register_frame(df, entry)
+    return df
+
+
+def _project_cached(md, projected):
+    """
+    Record that `projected` is a column subset of `md`, so that it shares
+    the serialized data cached for `md`'s Metadata.
+    """
+    entry = _cached_entry(md)
+    if entry is not None:
+        _register_frame(projected, entry)
+    return projected
+
+
+def _write_cached(fh, df, data_encoding, write_data):
+    """
+    Write `df` to `fh` with `write_data`, reusing (or caching) the output
+    when `df` came from the metadata cache unmodified.
+    """
+    entry = _cached_entry(df)
+    if entry is None:
+        write_data(fh, df)
+        return
+
+    key = (tuple(df.columns), data_encoding)
+    serialized = entry.serialized.get(key)
+    if serialized is None:
+        buf = io.StringIO()
+        write_data(buf, df)
+        serialized = entry.serialized[key] = buf.getvalue()
+    fh.write(serialized)
+
+
+def _clear_metadata_cache():
+    _METADATA_CACHE.clear()
+    _CACHED_FRAMES.clear()
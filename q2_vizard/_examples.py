@@ -7,14 +7,15 @@
 # ----------------------------------------------------------------------------
 
 import os
-import pkg_resources
+import importlib.resources
 
 import qiime2
 
 
 def _get_data_from_tests(path):
-    return pkg_resources.resource_filename('q2_vizard.tests',
-                                           os.path.join('data', path))
+    return os.fspath(
+        importlib.resources.files('q2_vizard.tests') / 'data' / path
+    )
 
 
 def md_factory():
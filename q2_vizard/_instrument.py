@@ -0,0 +1,293 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import json
+import time
+import logging
+import importlib
+import collections
+import contextlib
+import tracemalloc
+
+
+# the sinks that the timings of each render phase are reported to, separated
+# by commas: `log` (the `q2_vizard` logger), `file` (`_PHASES_FILENAME` in
+# the output directory) or a `module:callable` that is called with the
+# report. `1` is the same as `log`, and unset or `0` disables instrumentation.
+_INSTRUMENT_ENV_VAR = 'Q2_VIZARD_INSTRUMENT'
+
+_PHASES_FILENAME = 'render-phases.json'
+
+_LOGGER = logging.getLogger('q2_vizard')
+
+# the recorder of the render in progress, if it's instrumented. Phases
+# outside of an instrumented render share `_NULL_PHASE`, which does nothing.
+_RECORDER = None
+_NULL_PHASE = contextlib.nullcontext()
+
+
+class _PhaseRecord:
+    """
+    The totals of every time a phase of a render was entered.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.peak_bytes = 0
+        self.payload_bytes = None
+
+    def to_dict(self):
+        return {'calls': self.calls, 'seconds': self.seconds,
+                'peak_bytes': self.peak_bytes,
+                'payload_bytes': self.payload_bytes}
+
+
+class _Recorder:
+    """
+    Records the wall time, the peak memory allocated above what was held on
+    entry (as traced by `tracemalloc`), and the bytes written, of each phase
+    of one render. Phases may nest, in which case the outer phase includes
+    the inner one.
+    """
+    def __init__(self, visualizer):
+        self.visualizer = visualizer
+        self.phases = {}
+        # the highest traced memory seen so far within each open phase,
+        # since `tracemalloc` only keeps the one peak
+        self._peaks = []
+
+    @contextlib.contextmanager
+    def phase(self, name, fh=None):
+        record = self.phases.setdefault(name, _PhaseRecord())
+
+        start_bytes, peak = tracemalloc.get_traced_memory()
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], peak)
+        tracemalloc.reset_peak()
+        self._peaks.append(start_bytes)
+
+        start_position = fh.tell() if fh is not None else None
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds += time.perf_counter() - start
+            record.calls += 1
+
+            if fh is not None:
+                record.payload_bytes = (record.payload_bytes or 0) \
+                    + fh.tell() - start_position
+
+            peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+            record.peak_bytes = max(record.peak_bytes, peak - start_bytes)
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+
+    def report(self, output_dir):
+        files = {}
+        for dirpath, _, filenames in os.walk(output_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                files[os.path.relpath(path, output_dir)] = \
+                    os.path.getsize(path)
+
+        return {'visualizer': self.visualizer,
+                'phases': {name: record.to_dict()
+                           for name, record in self.phases.items()},
+                'files': dict(sorted(files.items()))}
+
+
+def _log_sink(report, output_dir):
+    for name, phase in report['phases'].items():
+        _LOGGER.info('%s %s: %.4fs, %d bytes peak memory%s',
+                     report['visualizer'], name, phase['seconds'],
+                     phase['peak_bytes'],
+                     '' if phase['payload_bytes'] is None
+                     else f", {phase['payload_bytes']} bytes written")
+
+
+def _file_sink(report, output_dir):
+    with open(os.path.join(output_dir, _PHASES_FILENAME), 'w') as fh:
+        json.dump(report, fh, indent=2)
+
+
+def _callback_sink(target):
+    module_name, _, attr = target.partition(':')
+    callback = getattr(importlib.import_module(module_name), attr)
+    return lambda report, output_dir: callback(report)
+
+
+def _sinks():
+    """
+    Return the sinks listed in `_INSTRUMENT_ENV_VAR`, each called with the
+    report and output directory of a render.
+    """
+    sinks = []
+    for token in os.environ.get(_INSTRUMENT_ENV_VAR, '').split(','):
+        token = token.strip()
+        if token in ('', '0'):
+            continue
+        if token in ('1', 'log'):
+            sinks.append(_log_sink)
+        elif token == 'file':
+            sinks.append(_file_sink)
+        elif ':' in token:
+            sinks.append(_callback_sink(token))
+        else:
+            raise ValueError(f'`{_INSTRUMENT_ENV_VAR}` must list `log`,'
+                             ' `file` or `module:callable` sinks, not'
+                             f' `{token}`.')
+    return sinks
+
+
+@contextlib.contextmanager
+def _recording(visualizer, output_dir):
+    """
+    Instrument the render of `visualizer` into `output_dir` that happens in
+    this context, if any sinks are configured.
+    """
+    global _RECORDER
+
+    sinks = _sinks()
+    if not sinks or _RECORDER is not None:
+        yield
+        return
+
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+
+    _RECORDER = _Recorder(visualizer)
+    try:
+        with _RECORDER.phase('render'):
+            yield
+        report = _RECORDER.report(output_dir)
+    finally:
+        _RECORDER = None
+        if started:
+            tracemalloc.stop()
+
+    for sink in sinks:
+        sink(report, output_dir)
+
+
+def _phase(name, fh=None):
+    """
+    A context that records the phase `name` of the render in progress, and
+    the bytes written to `fh` within it. Does nothing unless the render is
+    instrumented.
+    """
+    if _RECORDER is None:
+        return _NULL_PHASE
+    return _RECORDER.phase(name, fh)
+
+
+# runs each render under `cProfile` when set: `1` writes the profiles into
+# the output directory, and anything else is the directory to write them to
+_PROFILE_ENV_VAR = 'Q2_VIZARD_PROFILE'
+
+# call paths that took less than this fraction of the render are left out of
+# the collapsed stacks, which keeps their number bounded
+_MIN_STACK_FRACTION = 1e-4
+
+
+def _params_hash(metadata, params):
+    """
+    Return a short hash of the `params` of a render of `metadata`, which
+    names its profiles so that those of the same render can be compared.
+    """
+    import hashlib
+
+    key = json.dumps({'ids': metadata.id_count,
+                      'columns': list(metadata.columns), 'params': params},
+                     sort_keys=True, default=str)
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+def _frame_label(func):
+    filename, lineno, name = func
+    if filename == '~':
+        return name
+    return f'{name} ({os.path.basename(filename)}:{lineno})'
+
+
+def _collapsed_stacks(stats):
+    """
+    Return the collapsed stacks (`caller;callee microseconds`, as read by
+    flamegraph tools and written by py-spy) that best match the `pstats`
+    `stats`.
+
+    `cProfile` only records each caller/callee pair, so the time of a
+    function is split between the paths to it in proportion to the time
+    spent calling it from each caller.
+    """
+    callees = collections.defaultdict(dict)
+    for func, (*_, callers) in stats.items():
+        for caller, (*_, cumulative) in callers.items():
+            callees[caller][func] = cumulative
+
+    roots = [func for func, (*_, callers) in stats.items() if not callers]
+    min_seconds = _MIN_STACK_FRACTION * sum(stats[func][3] for func in roots)
+
+    stacks = collections.Counter()
+    pending = [(func, stats[func][3], ()) for func in roots]
+    while pending:
+        func, seconds, path = pending.pop()
+        _, _, own, cumulative, _ = stats[func]
+        if seconds < min_seconds or not cumulative:
+            continue
+
+        fraction = seconds / cumulative
+        path += (func,)
+        stacks[';'.join(map(_frame_label, path))] += own * fraction
+
+        for callee, callee_seconds in callees[func].items():
+            # recursive calls are already part of the caller's time
+            if callee not in path:
+                pending.append((callee, callee_seconds * fraction, path))
+
+    return [f'{stack} {round(seconds * 1e6)}'
+            for stack, seconds in sorted(stacks.items())
+            if round(seconds * 1e6)]
+
+
+@contextlib.contextmanager
+def _profiling(visualizer, output_dir, metadata, params):
+    """
+    Profile the render of `visualizer` that happens in this context when
+    `_PROFILE_ENV_VAR` is set, writing `<visualizer>-<params hash>.prof`
+    and `.collapsed` files.
+    """
+    profile_dir = os.environ.get(_PROFILE_ENV_VAR, '')
+    if profile_dir in ('', '0'):
+        yield
+        return
+
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+
+    if profile_dir == '1':
+        profile_dir = output_dir
+    os.makedirs(profile_dir, exist_ok=True)
+
+    prefix = os.path.join(
+        profile_dir, f'{visualizer}-{_params_hash(metadata, params)}')
+    profiler.dump_stats(f'{prefix}.prof')
+
+    stats = pstats.Stats(profiler).stats
+    with open(f'{prefix}.collapsed', 'w') as fh:
+        for line in _collapsed_stacks(stats):
+            fh.write(f'{line}\n')
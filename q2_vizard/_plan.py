@@ -0,0 +1,211 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import json
+
+from ._render import _render_html, _choose_renderer, _SIDECAR_ENCODING
+from ._instrument import _recording, _profiling, _phase
+
+
+# the most marks that a visualization draws, and the most bytes of data that
+# it embeds, before its data is reduced to fit. `0` removes the limit.
+_MAX_MARKS_ENV_VAR = 'Q2_VIZARD_MAX_MARKS'
+_MAX_EMBEDDED_BYTES_ENV_VAR = 'Q2_VIZARD_MAX_EMBEDDED_BYTES'
+_DEFAULT_MAX_MARKS = 500000
+_DEFAULT_MAX_EMBEDDED_BYTES = 100 * 2 ** 20
+
+# the plan each visualization was rendered with is written to this file in
+# its output directory
+_PLAN_FILENAME = 'render-plan.json'
+
+# downsampling is seeded, so that the same input always draws the same plot
+_DOWNSAMPLE_SEED = 0
+
+# the number of values of each column that are serialized when estimating
+# the size of the embedded data
+_WIDTH_SAMPLE_SIZE = 1000
+
+# the parameters that have a visualizer reduce its data to the same plot
+# drawn from far fewer marks
+_AGGREGATE_PARAMS = {
+    'heatmap': {'aggregate_method': 'mean'},
+    'boxplot': {'precompute_summary': True}
+}
+
+# the datasets of each visualizer that hold its marks, which are thinned out
+# (see `_downsample`) when there are still too many marks
+_SAMPLED_DATASETS = {
+    'scatterplot_2d': ('metadata',),
+    'lineplot': ('metadata', 'averaged_metadata'),
+    'heatmap': ('metadata',),
+    'boxplot': ('metadata', 'outliers')
+}
+
+
+def _budget(env_var, default):
+    try:
+        budget = int(os.environ.get(env_var, default) or 0)
+    except ValueError:
+        raise ValueError(f'`{env_var}` must be a whole number.')
+    return budget if budget > 0 else None
+
+
+def _over_budget(amount, budget):
+    return budget is not None and amount > budget
+
+
+def _can_aggregate(visualizer, params):
+    if visualizer == 'heatmap':
+        # the gradient can't be aggregated over cells that it defines
+        return params.get('aggregate_method') in (None, 'none') \
+            and params['gradient_measure'] not in (params['x_measure'],
+                                                   params['y_measure'])
+    if visualizer == 'boxplot':
+        return not params.get('precompute_summary')
+    return False
+
+
+def _downsample(frames, fraction, id_column):
+    """
+    Return a random `fraction` of the samples in each of the DataFrames
+    `frames`, with their rows in their original order.
+
+    The sample is drawn once, from the sorted IDs in `id_column`, so that the
+    same samples are kept in every DataFrame whatever the order of its rows.
+    DataFrames without that column hold aggregates: they're thinned by row
+    when none of `frames` has IDs (e.g. the cells of an aggregated heatmap),
+    and are otherwise kept whole (e.g. the averaged lines of a lineplot).
+    """
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(_DOWNSAMPLE_SEED)
+
+    ids = [df[id_column] for df in frames if id_column in df.columns]
+    if not ids:
+        return [df[rng.random(len(df)) < fraction] for df in frames]
+
+    ids = np.sort(pd.unique(pd.concat(ids)))
+    kept = ids[rng.random(len(ids)) < fraction]
+    return [df[df[id_column].isin(kept)] if id_column in df.columns else df
+            for df in frames]
+
+
+def _estimate_payload(values):
+    """
+    Estimate the size of the JSON records that the DataFrames in `values`
+    are embedded as, from their shape and the serialized width of the first
+    values of each column.
+    """
+    import pandas as pd
+
+    total = 0
+    for value in values.values():
+        if not isinstance(value, pd.DataFrame) or not len(value):
+            continue
+
+        # the braces & comma around each record
+        row_width = 3
+        sample = value.iloc[:_WIDTH_SAMPLE_SIZE]
+        for name, column in sample.items():
+            # the quoted key & colon, and the value (with its comma)
+            row_width += len(str(name)) + 3
+            row_width += \
+                (len(column.to_json(orient='values')) - 1) / len(sample)
+
+        total += row_width * len(value)
+    return int(total)
+
+
+def _render_planned(output_dir, visualizer, spec_function, metadata, params,
+                    data_encoding='records', renderer='auto'):
+    """
+    Build the spec of `visualizer` with `spec_function`, reducing its data
+    to stay within the render budgets, then render it into `output_dir`.
+
+    When there are too many marks, the data is first aggregated (where the
+    visualizer can draw the same plot from aggregated data), and then
+    downsampled. When the data is still too large to embed, it's written to
+    sidecar files instead. Any reduction is noted in the subtitle, and the
+    plan is written to `_PLAN_FILENAME` either way.
+
+    The render is instrumented when `Q2_VIZARD_INSTRUMENT` is set, and
+    profiled when `Q2_VIZARD_PROFILE` is set.
+    """
+    profile_params = {**params, 'data_encoding': data_encoding,
+                      'renderer': renderer}
+    with _recording(visualizer, output_dir), \
+            _profiling(visualizer, output_dir, metadata, profile_params):
+        _render_within_budget(output_dir, visualizer, spec_function,
+                              metadata, params, data_encoding, renderer)
+
+
+def _render_within_budget(output_dir, visualizer, spec_function, metadata,
+                          params, data_encoding, renderer):
+    max_marks = _budget(_MAX_MARKS_ENV_VAR, _DEFAULT_MAX_MARKS)
+    max_bytes = _budget(_MAX_EMBEDDED_BYTES_ENV_VAR,
+                        _DEFAULT_MAX_EMBEDDED_BYTES)
+
+    with _phase('spec'):
+        index, template, values, n_marks = spec_function(metadata, **params)
+    plan = {'visualizer': visualizer, 'max_marks': max_marks,
+            'max_embedded_bytes': max_bytes, 'marks': n_marks, 'steps': []}
+    notes = []
+
+    if _over_budget(n_marks, max_marks) \
+            and _can_aggregate(visualizer, params):
+        aggregate_params = _AGGREGATE_PARAMS[visualizer]
+        params = {**params, **aggregate_params}
+        with _phase('spec'):
+            index, template, values, n_marks = \
+                spec_function(metadata, **params)
+
+        plan['steps'].append({'mode': 'aggregate', 'marks': n_marks,
+                              'params': aggregate_params})
+        notes.append('The data was aggregated to fit the render budget.')
+
+    if _over_budget(n_marks, max_marks):
+        fraction = max_marks / n_marks
+        names = [name for name in _SAMPLED_DATASETS[visualizer]
+                 if name in values]
+        frames = _downsample([values[name] for name in names], fraction,
+                             values['md_ids'])
+        values.update(zip(names, frames))
+        n_marks = int(n_marks * fraction)
+
+        plan['steps'].append({'mode': 'downsample', 'marks': n_marks,
+                              'fraction': fraction,
+                              'seed': _DOWNSAMPLE_SEED})
+        notes.append(f'A random {fraction:.1%} of the data is shown, to fit'
+                     ' the render budget.')
+
+    with _phase('estimate_payload'):
+        n_bytes = _estimate_payload(values)
+    plan['estimated_bytes'] = n_bytes
+
+    # only the default encoding is replaced, since any other was chosen
+    if _over_budget(n_bytes, max_bytes) and data_encoding == 'records':
+        data_encoding = _SIDECAR_ENCODING
+
+        plan['steps'].append({'mode': 'sidecar'})
+        notes.append('The data is loaded from separate files, to fit the'
+                     ' render budget.')
+
+    plan['mode'] = '+'.join(step['mode'] for step in plan['steps']) or 'raw'
+    plan['data_encoding'] = data_encoding
+
+    if notes:
+        values['subtitle'] = \
+            ' '.join([values['subtitle'].strip(), *notes]).strip()
+
+    _render_html(output_dir, index, template, data_encoding,
+                 _choose_renderer(renderer, n_marks), **values)
+
+    with open(os.path.join(output_dir, _PLAN_FILENAME), 'w') as fh:
+        json.dump(plan, fh, indent=2)
@@ -0,0 +1,389 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import io
+import os
+import re
+import gzip
+import json
+import base64
+import secrets
+import functools
+import importlib.resources
+
+from ._util import _SpecTemplate
+from ._cache import _write_cached
+from ._vendor import _runtime_scripts
+from ._instrument import _phase
+
+
+# number of DataFrame rows serialized per `to_json` call when streaming
+# records into the output, which keeps the transient string size bounded
+_RECORDS_CHUNKSIZE = 10000
+
+# when set (to anything other than `0`), cached assets are checked against
+# their files on disk before use, so edits show up without a restart
+_RELOAD_ASSETS_ENV_VAR = 'Q2_VIZARD_RELOAD_ASSETS'
+
+# like `_DATA_MARKER`, holds a nonce (unique to each page) and a block name
+_BLOCK_MARKER = '{{BLOCK:%s:%s}}'
+# holds a nonce (unique to each spec) and a param name, so that no string
+# from the metadata or parameters can be mistaken for a marker
+_DATA_MARKER = '{{DATA_PARAM:%s:%s}}'
+
+# visualizations with more marks than this are drawn on a canvas (unless
+# their `renderer` is set), since SVG adds a DOM node for every mark
+_CANVAS_MARK_THRESHOLD = 10000
+
+# process-wide asset cache, populated by `_load_assets`
+_J_ENV = None
+_SPEC_CACHE = {}
+
+
+def _reload_assets():
+    return os.environ.get(_RELOAD_ASSETS_ENV_VAR, '0') not in ('', '0')
+
+
+def _get_jinja_env():
+    global _J_ENV
+
+    if _J_ENV is None:
+        # jinja2 is imported here rather than at the module level so that
+        # loading the plugin doesn't pay for it
+        import jinja2
+
+        _J_ENV = jinja2.Environment(
+            loader=jinja2.PackageLoader('q2_vizard', 'assets')
+        )
+    return _J_ENV
+
+
+def _load_assets(visualizer, spec_name='spec.json'):
+    """
+    Return the jinja `index.html` template and the `_SpecTemplate` for
+    `visualizer` (and the given `spec_name` within its assets).
+
+    Both are loaded once per process and then reused. The returned template
+    is shared between calls, so its spec must never be modified in place.
+    """
+    with _phase('load_assets'):
+        reload = _reload_assets()
+
+        J_ENV = _get_jinja_env()
+        J_ENV.auto_reload = reload
+        index = J_ENV.get_template(f'{visualizer}/index.html')
+
+        key = (visualizer, spec_name)
+        cached = _SPEC_CACHE.get(key)
+
+        if cached is not None and reload:
+            spec_fp, mtime, _ = cached
+            if os.path.getmtime(spec_fp) != mtime:
+                cached = None
+
+        if cached is None:
+            spec_fp = os.fspath(
+                importlib.resources.files('q2_vizard')
+                / 'assets' / visualizer / spec_name
+            )
+            mtime = os.path.getmtime(spec_fp)
+            cached = _SPEC_CACHE[key] = \
+                (spec_fp, mtime, _SpecTemplate.from_file(spec_fp))
+
+        _, _, template = cached
+    return index, template
+
+
+def _clear_asset_cache():
+    global _J_ENV
+
+    _J_ENV = None
+    _SPEC_CACHE.clear()
+
+
+def _write_records(fh, df, chunksize=_RECORDS_CHUNKSIZE):
+    """
+    Write `df` to `fh` as a records-oriented JSON array, serializing at most
+    `chunksize` rows at a time.
+    """
+    fh.write('[')
+    for start in range(0, len(df), chunksize):
+        if start:
+            fh.write(',')
+        chunk = df.iloc[start:start + chunksize].to_json(orient='records')
+        # strip the enclosing brackets so chunks join into a single array
+        fh.write(chunk[1:-1])
+    fh.write(']')
+
+
+def _write_columns(fh, df):
+    """
+    Write `df` to `fh` as a JSON object holding one array per column, which
+    `common/decode.js` turns back into records in the browser.
+    """
+    fh.write('{"encoding": "columns", "data": {')
+    for i, column in enumerate(df.columns):
+        if i:
+            fh.write(', ')
+        fh.write(json.dumps(str(column)))
+        fh.write(': ')
+        fh.write(df[column].to_json(orient='values'))
+    fh.write('}}')
+
+
+def _write_base64(fh, encoding, payload):
+    fh.write('{"encoding": "%s", "data": "' % encoding)
+    fh.write(base64.b64encode(payload).decode('ascii'))
+    fh.write('"}')
+
+
+def _write_gzip(fh, df):
+    """
+    Write `df` to `fh` as its records-oriented JSON array, gzip compressed
+    and base64 encoded.
+    """
+    buf = io.BytesIO()
+    # a fixed mtime keeps the output reproducible between runs
+    with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=6,
+                       mtime=0) as gz, \
+            io.TextIOWrapper(gz, encoding='utf-8') as text:
+        _write_records(text, df)
+    _write_base64(fh, 'gzip', buf.getvalue())
+
+
+def _write_arrow(fh, df):
+    """
+    Write `df` to `fh` as a base64 encoded Apache Arrow IPC stream.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError(
+            'The `arrow` data encoding requires the optional dependency'
+            ' `pyarrow`, which is not installed. Install `pyarrow`, or choose'
+            ' a different data encoding.'
+        ) from e
+
+    # 64-bit integers would be decoded as BigInts in the browser, which vega
+    # can't plot, so send them as doubles like the JSON encodings do
+    ints = df.select_dtypes(include='integer').columns
+    df = df.astype({column: 'float64' for column in ints})
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    _write_base64(fh, 'arrow', sink.getvalue().to_pybytes())
+
+
+# rather than being embedded, each DataFrame is written to its own records
+# JSON file in `_SIDECAR_DIR`, which vega loads by URL
+_SIDECAR_ENCODING = 'sidecar'
+_SIDECAR_DIR = 'data'
+
+# rather than being embedded in the spec, each DataFrame is written after it
+# in blocks of `_PROGRESSIVE_CHUNKSIZE` rows, which are inserted into the
+# rendered view one at a time so that the first rows are drawn right away
+_CHUNKED_ENCODING = 'chunked'
+_PROGRESSIVE_CHUNKSIZE = 20000
+_PROGRESSIVE_VISUALIZERS = ('scatterplot_2d', 'lineplot')
+
+# how each DataFrame is embedded in the spec, for each `data_encoding`
+_DATA_WRITERS = {
+    'records': _write_records,
+    'columns': _write_columns,
+    'gzip': _write_gzip,
+    'arrow': _write_arrow
+}
+
+
+def _write_spec(fh, template, data_encoding='records', **values):
+    """
+    Fill the `{{REPLACE_PARAM}}` slots of the `_SpecTemplate` `template`
+    with `values` and write the resulting spec to `fh` as JSON.
+
+    Any value that is a DataFrame is streamed from the DataFrame straight
+    into the output using `data_encoding`, rather than being converted to
+    Python objects and serialized a second time.
+    """
+    import pandas as pd
+
+    nonce = secrets.token_hex(8)
+    frames = {}
+    for param_name, value in values.items():
+        if isinstance(value, pd.DataFrame):
+            frames[param_name] = value
+            values[param_name] = _DATA_MARKER % (nonce, param_name)
+
+    write_data = _DATA_WRITERS[data_encoding]
+    with _phase('fill_spec'):
+        spec_string = json.dumps(template.fill(**values))
+
+    # splitting on the (quoted) markers alternates between static spec text
+    # and the name of the DataFrame that belongs in that position
+    marker_re = re.compile(r'"{{DATA_PARAM:%s:(.*?)}}"' % nonce)
+    for i, part in enumerate(marker_re.split(spec_string)):
+        if i % 2:
+            with _phase('write_data', fh):
+                _write_cached(fh, frames[part], data_encoding, write_data)
+        else:
+            fh.write(part)
+
+
+def _write_sidecars(output_dir, template, values):
+    """
+    Write each DataFrame in `values` to `output_dir`/data/<param>.json and
+    return the filled-in `template` spec, with those datasets loaded from
+    their files by URL.
+    """
+    import pandas as pd
+
+    nonce = secrets.token_hex(8)
+    urls = {}
+    for param_name, value in values.items():
+        if isinstance(value, pd.DataFrame):
+            url = f'{_SIDECAR_DIR}/{param_name}.json'
+            os.makedirs(os.path.join(output_dir, _SIDECAR_DIR),
+                        exist_ok=True)
+            with open(os.path.join(output_dir, url), 'w') as fh:
+                _write_cached(fh, value, 'records', _write_records)
+
+            marker = _DATA_MARKER % (nonce, param_name)
+            urls[marker] = url
+            values[param_name] = marker
+
+    spec = template.fill(**values)
+
+    # datasets holding a slot were copied by `fill`, so they can be modified
+    for data in spec.get('data', []):
+        marker = data.get('values')
+        if isinstance(marker, str) and marker in urls:
+            url = urls.pop(marker)
+            del data['values']
+            data['url'] = url
+            data['format'] = {'type': 'json'}
+
+    if urls:
+        raise ValueError('Only vega datasets can be written to sidecar'
+                         f' files, not: {", ".join(urls.values())}')
+
+    return spec
+
+
+def _chunked_frames(values, chunksize=_PROGRESSIVE_CHUNKSIZE):
+    """
+    Replace each DataFrame in `values` with a reference to the chunks that
+    `_write_chunks` writes it to, and return those DataFrames.
+    """
+    import pandas as pd
+
+    frames = {}
+    for param_name, value in values.items():
+        if isinstance(value, pd.DataFrame):
+            frames[param_name] = value
+            values[param_name] = {
+                'encoding': _CHUNKED_ENCODING, 'param': param_name,
+                'chunks': -(-len(value) // chunksize)
+            }
+    return frames
+
+
+def _write_chunks(fh, frames, chunksize=_PROGRESSIVE_CHUNKSIZE):
+    """
+    Write each DataFrame in `frames` to `fh` as a series of script blocks
+    holding (at most) `chunksize` records each.
+
+    The chunks of the DataFrames are interleaved, in the order that
+    `common/stream.js` inserts them, so that each is parsed before the
+    next one is needed.
+    """
+    n_chunks = max((-(-len(df) // chunksize) for df in frames.values()),
+                   default=0)
+    for i in range(n_chunks):
+        start = i * chunksize
+        for param_name, df in frames.items():
+            if start >= len(df):
+                continue
+            fh.write('<script type="application/json"'
+                     f' id="chunk-{param_name}-{i}">')
+            _write_records(fh, df.iloc[start:start + chunksize])
+            fh.write('</script>\n')
+
+
+def _render_blocks(output_dir, html, writers, nonce):
+    """
+    Write the rendered `html` to `output_dir`/index.html, with each
+    `_BLOCK_MARKER` (holding `nonce`) in it replaced by whatever
+    `writers[name]` writes to the file handle it's called with.
+    """
+    marker_re = re.compile(r'{{BLOCK:%s:(.*?)}}' % nonce)
+    with open(os.path.join(output_dir, 'index.html'), 'w') as fh:
+        # splitting on the markers alternates between static html and the
+        # name of the block that belongs in that position
+        for i, part in enumerate(marker_re.split(html)):
+            if i % 2:
+                with _phase(f'write_{part}', fh):
+                    writers[part](fh)
+            else:
+                fh.write(part)
+
+
+def _choose_renderer(renderer, n_marks):
+    """
+    Resolve the `renderer` parameter of a visualizer that draws `n_marks`
+    marks to the vega renderer that it's drawn with.
+    """
+    if renderer in (None, 'auto'):
+        if n_marks > _CANVAS_MARK_THRESHOLD:
+            return 'canvas'
+        return 'svg'
+    return renderer
+
+
+def _render_html(output_dir, index, template, data_encoding='records',
+                 renderer='svg', **values):
+    """
+    Render the jinja `index` template into `output_dir`/index.html, with the
+    filled-in `template` spec written in place of `{{ spec }}`, to be drawn
+    with the given vega `renderer`.
+    """
+    if data_encoding == _CHUNKED_ENCODING \
+            and os.path.dirname(index.name) not in _PROGRESSIVE_VISUALIZERS:
+        raise ValueError(f'The `{_CHUNKED_ENCODING}` data encoding is only'
+                         ' supported by the '
+                         + ' & '.join(_PROGRESSIVE_VISUALIZERS)
+                         + ' visualizers.')
+
+    nonce = secrets.token_hex(8)
+    chunks = _BLOCK_MARKER % (nonce, 'chunks') \
+        if data_encoding == _CHUNKED_ENCODING else ''
+    runtime = _runtime_scripts(output_dir, data_encoding)
+    with _phase('render_template'):
+        html = index.render(spec=_BLOCK_MARKER % (nonce, 'spec'),
+                            chunks=chunks, renderer=renderer,
+                            runtime=runtime)
+
+    writers = {}
+
+    if data_encoding == _SIDECAR_ENCODING:
+        with _phase('write_sidecars'):
+            spec = _write_sidecars(output_dir, template, values)
+        writers['spec'] = functools.partial(json.dump, spec)
+    elif data_encoding == _CHUNKED_ENCODING:
+        chunksize = _PROGRESSIVE_CHUNKSIZE
+        frames = _chunked_frames(values, chunksize)
+        writers['spec'] = functools.partial(_write_spec, template=template,
+                                            **values)
+        writers['chunks'] = functools.partial(_write_chunks, frames=frames,
+                                              chunksize=chunksize)
+    else:
+        writers['spec'] = functools.partial(_write_spec, template=template,
+                                            data_encoding=data_encoding,
+                                            **values)
+
+    _render_blocks(output_dir, html, writers, nonce)
@@ -0,0 +1,103 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+
+def _synthetic_dataframe(n_rows, n_numeric=4, n_categorical=2,
+                         cardinality=5, replicates=None, missing_rate=0.0,
+                         skew=0.0, outlier_rate=0.0, seed=0):
+    """
+    Build a metadata-shaped DataFrame of `n_rows` random samples, indexed
+    by sample ID, for scale and stress testing. The same arguments always
+    build the same DataFrame.
+
+    Parameters
+    ----------
+    n_numeric, n_categorical : int
+        The number of `numeric<i>` and `categorical<i>` columns.
+    cardinality : int or list of int
+        The number of distinct values of each categorical column (of all of
+        them, or of each in turn).
+    replicates : int, optional
+        When given, a numeric `timepoint` column is added (for `lineplot`),
+        with about `replicates` samples at each timepoint within each
+        `categorical0` group. `1` has no replicates.
+    missing_rate : float
+        The fraction of values of each numeric and categorical column that
+        are missing.
+    skew : float
+        The numeric columns are drawn from a normal distribution when `0`,
+        and from a lognormal distribution with this sigma otherwise.
+    outlier_rate : float
+        The fraction of numeric values (for `boxplot`) moved 10 to 20
+        standard deviations away from the rest.
+    """
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+
+    index = pd.Index(np.char.add('sample', np.arange(n_rows).astype(str)),
+                     dtype=object, name='id')
+
+    if np.ndim(cardinality) == 0:
+        cardinality = [cardinality] * n_categorical
+    if len(cardinality) != n_categorical:
+        raise ValueError('A `cardinality` must be given for each of the'
+                         f' {n_categorical} categorical columns.')
+
+    columns = {}
+    for i in range(n_numeric):
+        if skew:
+            values = rng.lognormal(sigma=skew, size=n_rows)
+        else:
+            values = rng.normal(size=n_rows)
+
+        if outlier_rate:
+            outliers = rng.random(n_rows) < outlier_rate
+            offsets = rng.uniform(10, 20, size=outliers.sum()) \
+                * rng.choice([-1, 1], size=outliers.sum())
+            values[outliers] = values.mean() + offsets * values.std()
+
+        columns[f'numeric{i}'] = values
+
+    codes = {}
+    for i, n_values in enumerate(cardinality):
+        labels = np.char.add('group', np.arange(n_values).astype(str))
+        codes[i] = rng.integers(n_values, size=n_rows)
+        columns[f'categorical{i}'] = labels.astype(object)[codes[i]]
+
+    for name, values in columns.items():
+        missing = rng.random(n_rows) < missing_rate
+        if missing.any():
+            values = values.astype(float if name.startswith('numeric')
+                                   else object)
+            values[missing] = np.nan
+            columns[name] = values
+
+    if replicates is not None:
+        # number each sample within its group, so that every `replicates`
+        # samples of a group share a timepoint
+        groups = codes.get(0, np.zeros(n_rows, dtype=int))
+        order = np.argsort(groups, kind='stable')
+        sorted_groups = groups[order]
+        starts = np.searchsorted(sorted_groups, sorted_groups)
+
+        position = np.empty(n_rows, dtype=int)
+        position[order] = np.arange(n_rows) - starts
+        columns['timepoint'] = (position // replicates).astype(float)
+
+    return pd.DataFrame(columns, index=index)
+
+
+def _synthetic_metadata(n_rows, **kwargs):
+    """
+    Return `_synthetic_dataframe(n_rows, **kwargs)` as `qiime2.Metadata`.
+    """
+    from qiime2 import Metadata
+
+    return Metadata(_synthetic_dataframe(n_rows, **kwargs))
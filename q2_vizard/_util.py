@@ -6,24 +6,133 @@
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
 
+import json
+
+from ._cache import _project_cached
+from ._instrument import _phase
+
+
+_REPLACE_PARAM = '{{REPLACE_PARAM}}'
+
+
+def _is_slot(json_obj):
+    return type(json_obj) is dict and list(json_obj) == [_REPLACE_PARAM]
+
+
+class _SpecTemplate:
+    """
+    A parsed JSON spec with the location of every
+    `{"{{REPLACE_PARAM}}": "some_key"}` slot recorded up front, so that
+    filling the slots only touches the path from the root to each slot.
+    """
+    def __init__(self, json_obj):
+        self.json_obj = json_obj
+        self.slots = list(self._find_slots(json_obj, ()))
+
+        # nested {key: subtree} mapping of every slot path, where the leaves
+        # are the names of the params that fill them
+        self._slot_tree = {}
+        for path, param_name in self.slots:
+            node = self._slot_tree
+            for key in path[:-1]:
+                node = node.setdefault(key, {})
+            if path:
+                node[path[-1]] = param_name
+
+        # templates derived from this one, keyed by the function that
+        # derives them (see `derived`)
+        self._derived = {}
+
+    @classmethod
+    def from_file(cls, fp):
+        with open(fp) as fh:
+            return cls(json.load(fh))
+
+    def derived(self, derive):
+        """
+        Return the template `derive(self)`, which is only derived once and is
+        then kept on (and dropped along with) this template.
+        """
+        if derive not in self._derived:
+            self._derived[derive] = derive(self)
+        return self._derived[derive]
+
+    @property
+    def params(self):
+        return {param_name for _, param_name in self.slots}
+
+    @classmethod
+    def _find_slots(cls, json_obj, path):
+        if _is_slot(json_obj):
+            yield path, json_obj[_REPLACE_PARAM]
+
+        elif type(json_obj) is list:
+            for idx, value in enumerate(json_obj):
+                yield from cls._find_slots(value, path + (idx,))
+
+        elif type(json_obj) is dict:
+            for key, value in json_obj.items():
+                yield from cls._find_slots(value, path + (key,))
+
+    def fill(self, **values):
+        """
+        Return a copy of the spec with each slot replaced by
+        `values["some_key"]`. Containers that do not hold a slot are shared
+        with the template rather than copied.
+        """
+        if not self.slots:
+            return self.json_obj
+
+        if self.slots[0][0] == ():
+            return values[self.slots[0][1]]
+
+        return self._fill(self.json_obj, self._slot_tree, values)
+
+    @classmethod
+    def _fill(cls, json_obj, slot_tree, values):
+        filled = json_obj.copy()
+        for key, subtree in slot_tree.items():
+            if type(subtree) is dict:
+                filled[key] = cls._fill(json_obj[key], subtree, values)
+            else:
+                filled[key] = values[subtree]
+        return filled
+
+
 def _json_replace(json_obj, **values):
     """
     Search for elements of `{"{{REPLACE_PARAM}}": "some_key"}` and replace
     with the result of `values["some_key"]`.
     """
-    if type(json_obj) is dict and list(json_obj) == ["{{REPLACE_PARAM}}"]:
-        param_name = json_obj["{{REPLACE_PARAM}}"]
-        return values[param_name]
+    return _SpecTemplate(json_obj).fill(**values)
 
-    if type(json_obj) is list:
-        return [_json_replace(x, **values) for x in json_obj]
 
-    elif type(json_obj) is dict:
-        return {key: _json_replace(value, **values)
-                for key, value in json_obj.items()}
+class _ColumnSchema:
+    """
+    The name and type of every column of a Metadata, in column order, read
+    from `metadata.columns` so that checking columns never has to build a
+    DataFrame.
+    """
+    def __init__(self, metadata):
+        self.types = {name: props.type
+                      for name, props in metadata.columns.items()}
 
-    else:
-        return json_obj
+    def __contains__(self, column):
+        return column in self.types
+
+    def of_type(self, col_type):
+        return [name for name, type_ in self.types.items()
+                if type_ == col_type]
+
+
+def _column_schema(metadata):
+    """
+    Return the `_ColumnSchema` of `metadata`, which may already be one.
+    """
+    if isinstance(metadata, _ColumnSchema):
+        return metadata
+    with _phase('validate'):
+        return _ColumnSchema(metadata)
 
 
 def _col_type_validation(metadata, measure, col_type):
@@ -35,11 +144,9 @@ def _col_type_validation(metadata, measure, col_type):
         raise TypeError('Invalid column type provided. Must be `categorical`'
                         ' or `numeric`.')
 
-    valid_columns_md = \
-        metadata.filter_columns(column_type=col_type).to_dataframe()
-    valid_columns_list = list(valid_columns_md.columns)
+    schema = _column_schema(metadata)
 
-    if measure not in valid_columns_list:
+    if schema.types.get(measure) != col_type:
         raise TypeError(f'`{measure}` not of type `{md_type}`.')
 
 
@@ -50,7 +157,7 @@ def _measure_validation(metadata, measure):
     # providing a user with a rendered Vega spec with modified column name(s).
     disallowed_chars = ['[]', '[', ']', '.', '\\', "'", '"']
 
-    if measure not in metadata.columns:
+    if measure not in _column_schema(metadata):
         raise ValueError(f'`{measure}` not found as a column in the Metadata.')
 
     for char in disallowed_chars:
@@ -60,3 +167,28 @@ def _measure_validation(metadata, measure):
                 f' be parsed by this visualization. Please remove `{char}`'
                 ' from this Metadata column name.'
             )
+
+
+def _restrict_columns(metadata, available_columns, columns, measures):
+    """
+    Restrict `available_columns` to the ones listed in `columns`, while
+    always keeping any of the chosen `measures`. If `columns` is None,
+    `available_columns` is returned as-is.
+    """
+    if columns is None:
+        return available_columns
+
+    schema = _column_schema(metadata)
+    for column in columns:
+        _measure_validation(metadata=schema, measure=column)
+
+    keep = set(columns) | {measure for measure in measures if measure}
+    return [column for column in available_columns if column in keep]
+
+
+def _project_columns(md, *columns):
+    """
+    Keep only `columns` from `md`, so that the rendered visualization only
+    embeds the data that it can actually display.
+    """
+    return _project_cached(md, md[list(dict.fromkeys(columns))])
@@ -0,0 +1,144 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import shutil
+import collections
+import importlib.resources
+
+
+class _RuntimeScript(collections.namedtuple(
+        '_RuntimeScript',
+        ['package', 'version', 'path', 'integrity', 'license_path'],
+        defaults=[None, 'LICENSE'])):
+    """
+    A pinned file of an npm package that visualizations load in the browser,
+    and the license file of that package.
+
+    `integrity` is the subresource integrity hash of the file (in the form
+    that jsDelivr publishes it), which the browser checks the file loaded
+    from the CDN against.
+    """
+    @property
+    def url(self):
+        return (f'https://cdn.jsdelivr.net/npm/{self.package}@{self.version}'
+                f'/{self.path}')
+
+    @property
+    def filename(self):
+        return f'{self.package}-{self.version}.min.js'
+
+    @property
+    def license_filename(self):
+        return f'{self.package}-{self.version}.LICENSE'
+
+
+# loaded by every visualization, in this order
+_VEGA_RUNTIME = (
+    _RuntimeScript('vega', '5.22.1', 'build/vega.min.js',
+                   'sha256-cx8BtoEWvBhaGWMiCWyjQnN0JMSZXEimZ09X68ln6cE='),
+    _RuntimeScript('vega-embed', '6.20.8', 'build/vega-embed.min.js',
+                   'sha256-5ckpBPG2FOVKaoYOzxlMqIv5SLT663r5oP4srZPccw4='),
+)
+
+# only loaded for the `arrow` data encoding, to decode the embedded data
+_ARROW_RUNTIME = (
+    _RuntimeScript('apache-arrow', '14.0.2', 'Arrow.es2015.min.js',
+                   license_path='LICENSE.txt'),
+)
+
+_RUNTIME_SCRIPTS = _VEGA_RUNTIME + _ARROW_RUNTIME
+
+# vendored runtime scripts (see `make vendor`) are found in, and copied into,
+# a directory of this name within the assets and each rendered visualization
+_VENDOR_DIR = 'vendor'
+
+
+def _vendor_assets_dir():
+    return os.fspath(
+        importlib.resources.files('q2_vizard') / 'assets' / _VENDOR_DIR)
+
+
+def _runtime_scripts(output_dir, data_encoding='records'):
+    """
+    Return the `src` and `integrity` of each runtime script that the
+    visualization in `output_dir` loads, in load order.
+
+    Vendored scripts are copied into `output_dir`, so that the visualization
+    renders without network access, and any others are loaded from the CDN,
+    checked against their `integrity` hash when one is pinned.
+    """
+    scripts = _VEGA_RUNTIME
+    if data_encoding == 'arrow':
+        scripts += _ARROW_RUNTIME
+
+    srcs = []
+    for script in scripts:
+        vendored = os.path.join(_vendor_assets_dir(), script.filename)
+        if not os.path.isfile(vendored):
+            srcs.append((script.url, script.integrity))
+            continue
+
+        os.makedirs(os.path.join(output_dir, _VENDOR_DIR), exist_ok=True)
+        # the license travels with each copy of the script
+        for filename in (script.filename, script.license_filename):
+            src = os.path.join(_vendor_assets_dir(), filename)
+            if os.path.isfile(src):
+                shutil.copyfile(
+                    src, os.path.join(output_dir, _VENDOR_DIR, filename))
+        srcs.append((f'{_VENDOR_DIR}/{script.filename}', None))
+    return srcs
+
+
+def _fetch_runtime(vendor_dir=None):
+    """
+    Download every runtime script, and the license it's distributed under,
+    into `vendor_dir` (the package's vendored assets by default), checking
+    each file against the hash that jsDelivr publishes for it, and each
+    script against its pinned `integrity` too.
+    """
+    import json
+    import base64
+    import hashlib
+    import urllib.request
+
+    if vendor_dir is None:
+        vendor_dir = _vendor_assets_dir()
+    os.makedirs(vendor_dir, exist_ok=True)
+
+    for script in _RUNTIME_SCRIPTS:
+        listing_url = ('https://data.jsdelivr.com/v1/package/npm/'
+                       f'{script.package}@{script.version}/flat')
+        with urllib.request.urlopen(listing_url) as response:
+            listing = json.load(response)
+        hashes = {file['name']: file['hash'] for file in listing['files']}
+
+        for path, filename in ((script.path, script.filename),
+                               (script.license_path,
+                                script.license_filename)):
+            url = (f'https://cdn.jsdelivr.net/npm/{script.package}'
+                   f'@{script.version}/{path}')
+            with urllib.request.urlopen(url) as response:
+                content = response.read()
+
+            digest = base64.b64encode(
+                hashlib.sha256(content).digest()).decode()
+            expected = {hashes.get(f'/{path}')}
+            if path == script.path and script.integrity is not None:
+                expected.add(script.integrity.partition('-')[2])
+            if expected != {digest}:
+                raise ValueError(f'The downloaded {url} does not match the'
+                                 ' hash published or pinned for it.')
+
+            with open(os.path.join(vendor_dir, filename), 'wb') as fh:
+                fh.write(content)
+            print(f'Vendored {url} as {filename}')
+
+
+if __name__ == '__main__':
+    _fetch_runtime()
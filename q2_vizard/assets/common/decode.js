@@ -0,0 +1,69 @@
+  // Datasets may be embedded in the spec in an encoded form rather than as
+  // an array of records (see `data_encoding` in q2_vizard/_render.py).
+  // These rebuild the records that vega expects from any encoded datasets.
+  function columnsToRecords(columns) {
+    var names = Object.keys(columns);
+    var length = names.length > 0 ? columns[names[0]].length : 0;
+    var records = new Array(length);
+
+    for (var i = 0; i < length; i++) {
+      var record = {};
+      for (var j = 0; j < names.length; j++) {
+        record[names[j]] = columns[names[j]][i];
+      }
+      records[i] = record;
+    }
+    return records;
+  }
+
+  function base64ToBytes(data) {
+    // fetching a data URL decodes large payloads much faster than atob
+    return fetch('data:application/octet-stream;base64,' + data)
+      .then(function(response) { return response.arrayBuffer(); })
+      .then(function(buffer) { return new Uint8Array(buffer); });
+  }
+
+  function gunzipToRecords(data) {
+    return base64ToBytes(data).then(function(bytes) {
+      var stream = new Blob([bytes]).stream()
+        .pipeThrough(new DecompressionStream('gzip'));
+      return new Response(stream).json();
+    });
+  }
+
+  function arrowToRecords(data) {
+    return base64ToBytes(data).then(function(bytes) {
+      return Arrow.tableFromIPC(bytes).toArray().map(function(row) {
+        return row.toJSON();
+      });
+    });
+  }
+
+  // keyed by the `encoding` of each encoded dataset
+  var decoders = {
+    'columns': function(values) {
+      return Promise.resolve(columnsToRecords(values.data));
+    },
+    'gzip': function(values) { return gunzipToRecords(values.data); },
+    'arrow': function(values) { return arrowToRecords(values.data); }
+  };
+
+  // returns a promise for the records of `values`, decoding them if needed
+  function decodeValues(values) {
+    if (values && !Array.isArray(values) && decoders[values.encoding]) {
+      return decoders[values.encoding](values);
+    }
+    return Promise.resolve(values);
+  }
+
+  // returns a promise for `spec`, once all of its datasets are decoded
+  function decodeSpec(spec) {
+    var decoded = (spec.data || []).map(function(data) {
+      return decodeValues(data.values).then(function(records) {
+        if (records !== undefined) {
+          data.values = records;
+        }
+      });
+    });
+    return Promise.all(decoded).then(function() { return spec; });
+  }
@@ -0,0 +1,95 @@
+  // Datasets embedded with the `chunked` data encoding start out empty, and
+  // their records are inserted into the view from the numbered chunk blocks
+  // at the end of the page (see `_write_chunks` in q2_vizard/_render.py),
+  // so that the first of them are drawn before the rest have been parsed.
+  decoders['chunked'] = function(values) { return Promise.resolve([]); };
+
+  // must be called before `decodeSpec`, which replaces the chunked values
+  function chunkedDatasets(spec) {
+    return (spec.data || []).filter(function(data) {
+      return data.values && data.values.encoding === 'chunked';
+    }).map(function(data) {
+      return {'name': data.name, 'param': data.values.param,
+              'chunks': data.values.chunks};
+    });
+  }
+
+  // yield to the browser, so that it can paint the view in between chunks
+  function nextFrame() {
+    return new Promise(function(resolve) { setTimeout(resolve, 0); });
+  }
+
+  // the chunk blocks follow the script that embeds the view, so the page
+  // may still be parsing a chunk when it's reached. A block is complete once
+  // the parser has moved on past it, or the whole page has been parsed.
+  function chunkBlock(id) {
+    var block = document.getElementById(id);
+    if (document.readyState !== 'loading'
+        || (block !== null && block.nextElementSibling !== null)) {
+      return Promise.resolve(block);
+    }
+    return nextFrame().then(function() { return chunkBlock(id); });
+  }
+
+  function insertChunk(view, dataset, index) {
+    return chunkBlock('chunk-' + dataset.param + '-' + index)
+      .then(function(block) {
+        var records = JSON.parse(block.textContent);
+        // the parsed records are now held by the view
+        block.remove();
+
+        return view.change(dataset.name, vega.changeset().insert(records))
+          .runAsync();
+      });
+  }
+
+  // returns a promise that resolves once every chunk is in the view
+  function streamChunks(view, datasets) {
+    var total = datasets.reduce(function(n, dataset) {
+      return n + dataset.chunks;
+    }, 0);
+    if (total === 0) {
+      return Promise.resolve(view);
+    }
+
+    var progress = document.createElement('div');
+    progress.id = 'progress';
+    progress.setAttribute('role', 'progressbar');
+    progress.style.cssText = 'position: fixed; top: 25px; right: 25px;'
+      + ' font-family: monospace;';
+    document.body.appendChild(progress);
+
+    var loaded = 0;
+    function update() {
+      var percent = Math.round(100 * loaded / total);
+      progress.setAttribute('aria-valuenow', percent);
+      progress.textContent = 'Loading data: ' + percent + '%';
+    }
+    update();
+
+    // the chunks of each dataset are inserted in turn, so that e.g. a
+    // lineplot's lines are drawn alongside its points
+    var chain = Promise.resolve();
+    var maxChunks = Math.max.apply(null, datasets.map(function(dataset) {
+      return dataset.chunks;
+    }));
+    for (var i = 0; i < maxChunks; i++) {
+      datasets.forEach(function(dataset) {
+        var index = i;
+        if (index >= dataset.chunks) {
+          return;
+        }
+        chain = chain.then(nextFrame).then(function() {
+          return insertChunk(view, dataset, index);
+        }).then(function() {
+          loaded++;
+          update();
+        });
+      });
+    }
+
+    return chain.then(function() {
+      progress.remove();
+      return view;
+    });
+  }
@@ -0,0 +1,187 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import inspect
+import contextlib
+
+from qiime2 import Metadata
+
+from .scatterplot import scatterplot_2d
+from .heatmap import heatmap
+from .lineplot import lineplot
+from .boxplot import boxplot
+from ._cache import _metadata_cache_enabled, _metadata_dataframe
+from ._render import _get_jinja_env
+from ._util import (_column_schema, _measure_validation,
+                    _col_type_validation)
+
+
+_VISUALIZERS = {
+    'scatterplot_2d': scatterplot_2d,
+    'heatmap': heatmap,
+    'lineplot': lineplot,
+    'boxplot': boxplot
+}
+
+# the parameters of each visualizer that name Metadata columns, and the type
+# that each column must be (`None` if either type can be used)
+_MEASURE_PARAMS = {
+    'scatterplot_2d': {'x_measure': 'numeric', 'y_measure': 'numeric',
+                       'color_by': 'categorical', 'columns': None},
+    'heatmap': {'x_measure': None, 'y_measure': None,
+                'gradient_measure': 'numeric'},
+    'lineplot': {'x_measure': 'numeric', 'y_measure': 'numeric',
+                 'group_by': 'categorical', 'columns': None},
+    'boxplot': {'distribution_measure': 'numeric',
+                'group_by': 'categorical'}
+}
+
+
+def _validate_measures(schema, name, visualizer, params):
+    for param, col_type in _MEASURE_PARAMS[visualizer].items():
+        measures = params.get(param)
+        if measures is None:
+            continue
+        if param != 'columns':
+            measures = [measures]
+
+        for measure in measures:
+            try:
+                _measure_validation(metadata=schema, measure=measure)
+                if col_type is not None:
+                    _col_type_validation(metadata=schema, measure=measure,
+                                         col_type=col_type)
+            except (ValueError, TypeError) as e:
+                raise type(e)(f'Invalid `{param}` for plot `{name}`'
+                              f' ({visualizer}): {e}') from e
+
+
+def _plan_plots(plots, metadata):
+    """
+    Check every plot in `plots` up front, including that the columns they
+    name are in `metadata` and are of the right type (so that a bad one
+    doesn't fail the batch part of the way through), and return them as a
+    list of `(name, visualizer, params)`.
+    """
+    schema = _column_schema(metadata)
+    planned = []
+    names = set()
+
+    for idx, plot in enumerate(plots):
+        params = dict(plot)
+        visualizer = params.pop('visualizer', None)
+        name = params.pop('name', f'{idx:03d}-{visualizer}')
+
+        if visualizer not in _VISUALIZERS:
+            raise ValueError(f'Plot {idx} has an unknown `visualizer`:'
+                             f' `{visualizer}`. Options are:'
+                             f' {", ".join(_VISUALIZERS)}.')
+
+        if not isinstance(name, str) or not name or os.sep in name \
+                or name.startswith('.'):
+            raise ValueError(f'Plot name `{name}` cannot be used as a'
+                             ' directory name.')
+        if name in names:
+            raise ValueError(f'More than one plot is named `{name}`. Please'
+                             ' give each plot a unique `name`.')
+        names.add(name)
+
+        signature = inspect.signature(_VISUALIZERS[visualizer])
+        try:
+            signature.bind(output_dir=None, metadata=None, **params)
+        except TypeError as e:
+            raise ValueError(f'Invalid parameters for plot `{name}`'
+                             f' ({visualizer}): {e}') from e
+        _validate_measures(schema, name, visualizer, params)
+
+        planned.append((name, visualizer, params))
+
+    return planned
+
+
+def _render_plot(output_dir, metadata, name, visualizer, params):
+    plot_dir = os.path.join(output_dir, name)
+    os.makedirs(plot_dir, exist_ok=True)
+    _VISUALIZERS[visualizer](output_dir=plot_dir, metadata=metadata, **params)
+
+
+# state of each worker process of a parallel batch, set by `_init_worker`
+_WORKER_METADATA = None
+_WORKER_CACHE = contextlib.ExitStack()
+
+
+def _init_worker(metadata):
+    global _WORKER_METADATA
+
+    _WORKER_METADATA = metadata
+    # keep the metadata cached for the lifetime of the worker
+    _WORKER_CACHE.enter_context(_metadata_cache_enabled())
+
+
+def _render_worker_plot(output_dir, name, visualizer, params):
+    _render_plot(output_dir, _WORKER_METADATA, name, visualizer, params)
+
+
+def _mp_context():
+    # forked workers share the parent's memory copy-on-write, so the
+    # metadata (and its already converted DataFrame) never has to be copied
+    # into them. Elsewhere, each worker is sent the metadata once.
+    import multiprocessing
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def batch(output_dir: str, metadata: Metadata, plots: list,
+          n_jobs: int = 1):
+    """
+    Render every plot in `plots` from the same `metadata`.
+
+    Each plot is a dict with a `visualizer` (one of `scatterplot_2d`,
+    `heatmap`, `lineplot` or `boxplot`), an optional `name`, and the
+    parameters for that visualizer. Each plot is rendered into
+    `output_dir`/`name`/index.html, and `output_dir`/index.html links to all
+    of them.
+
+    The metadata is converted to a DataFrame once for the whole batch (or
+    once per worker process, when `n_jobs` is more than 1), and plots that
+    embed the same columns share their serialized data.
+    """
+    if n_jobs < 1:
+        raise ValueError(f'`n_jobs` must be at least 1, not {n_jobs}.')
+
+    planned = _plan_plots(plots, metadata)
+
+    with _metadata_cache_enabled():
+        if n_jobs == 1 or len(planned) < 2:
+            for name, visualizer, params in planned:
+                _render_plot(output_dir, metadata, name, visualizer, params)
+        else:
+            import concurrent.futures
+
+            # converted before the workers are forked, so that they inherit
+            # the DataFrame rather than each building their own
+            _metadata_dataframe(metadata)
+
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=min(n_jobs, len(planned)),
+                    mp_context=_mp_context(),
+                    initializer=_init_worker,
+                    initargs=(metadata,)) as executor:
+                futures = [
+                    executor.submit(_render_worker_plot, output_dir, *plot)
+                    for plot in planned
+                ]
+                for future in futures:
+                    future.result()
+
+    index = _get_jinja_env().get_template('batch/index.html')
+    with open(os.path.join(output_dir, 'index.html'), 'w') as fh:
+        fh.write(index.render(plots=planned))
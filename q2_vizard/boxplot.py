@@ -6,44 +6,115 @@
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
 
-import os
-import json
-import pkg_resources
-import jinja2
+import copy
 
 from qiime2 import Metadata, NumericMetadataColumn, CategoricalMetadataColumn
-from ._util import _json_replace, _measure_validation, _col_type_validation
-
-
-def boxplot(output_dir: str, metadata: Metadata,
-            distribution_measure: NumericMetadataColumn,
-            group_by: CategoricalMetadataColumn = None,
-            whisker_range: str = 'percentile',
-            box_orientation: str = 'horizontal',
-            title: str = None):
+from ._util import (_SpecTemplate, _REPLACE_PARAM, _column_schema,
+                    _measure_validation, _col_type_validation,
+                    _project_columns)
+from ._cache import _metadata_dataframe
+from ._render import _load_assets
+from ._plan import _render_planned
+
+
+def _box_summary(md, distribution_measure, group_by, whisker_range):
+    """
+    Compute the statistics that the boxplot spec would otherwise derive in
+    Vega, returning one summary row per group (in order of first appearance)
+    and the rows that fall outside of the whiskers.
+    """
+    grouped = md.groupby(group_by, sort=False, dropna=False)
+    values = grouped[distribution_measure]
+
+    # pandas' linear interpolation matches the quantiles computed by Vega
+    quantiles = values.quantile([0.25, 0.5, 0.75, 0.09, 0.91]).unstack()
+    quantiles.columns = ['q1', 'median', 'q3', 'p09', 'p91']
+
+    summary = values.agg(['min', 'max']).join(quantiles)
+    summary = summary[['min', 'q1', 'median', 'q3', 'max', 'p09', 'p91']]
+    summary['iqr'] = summary['q3'] - summary['q1']
+
+    if whisker_range == 'tukeys_iqr':
+        summary['whiskerLow'] = \
+            (summary['q1'] - 1.5 * summary['iqr']).clip(lower=summary['min'])
+        summary['whiskerHigh'] = \
+            (summary['q3'] + 1.5 * summary['iqr']).clip(upper=summary['max'])
+    elif whisker_range == 'percentile':
+        summary['whiskerLow'] = summary['p09']
+        summary['whiskerHigh'] = summary['p91']
+    elif whisker_range == 'minmax':
+        summary['whiskerLow'] = summary['min']
+        summary['whiskerHigh'] = summary['max']
+
+    distribution = md[distribution_measure]
+    low = md[group_by].map(summary['whiskerLow'])
+    high = md[group_by].map(summary['whiskerHigh'])
+    is_outlier = (distribution < low) | (distribution > high)
+
+    return summary.reset_index(), md.loc[is_outlier]
+
+
+def _summary_template(template):
+    """
+    Derive a spec template from a boxplot `template` where the `summary` and
+    `outliers` datasets are filled in directly, rather than computed in Vega
+    from the full `table` dataset.
+    """
+    spec = copy.deepcopy(template.json_obj)
+
+    # the row/column counts only need the groups, which `summary` provides
+    count_tables = [dict(data, source='summary') for data in spec['data']
+                    if data['name'] in ('rowTable', 'columnTable')]
+    spec['data'] = [
+        {'name': 'summary', 'values': {_REPLACE_PARAM: 'summary'}},
+        {'name': 'outliers', 'values': {_REPLACE_PARAM: 'outliers'}},
+        *count_tables
+    ]
+
+    # domains that were drawn from `table` are drawn from `summary` instead,
+    # with the extent of the distribution taken from the min/max columns
+    for scale in spec['scales']:
+        domain = scale['domain']
+        if domain['data'] != 'table':
+            continue
+
+        domain['data'] = 'summary'
+        if domain['field'] == {_REPLACE_PARAM: 'distribution_measure'}:
+            del domain['field']
+            domain['fields'] = ['min', 'max']
+
+    return _SpecTemplate(spec)
+
+
+def _boxplot_spec(metadata, distribution_measure, group_by=None,
+                  whisker_range='percentile', box_orientation='horizontal',
+                  title=None, precompute_summary=False):
+    """
+    Return the jinja `index.html` template, the `_SpecTemplate` and the
+    values to fill it with for a boxplot of `metadata`, along with the
+    (estimated) number of marks that it draws.
+    """
 
     # input handling for initial metadata
-    md = metadata.to_dataframe().reset_index()
+    md = _metadata_dataframe(metadata)
     md_ids = metadata.id_header
+    schema = _column_schema(metadata)
 
     # input validation for distribution & group_by measures
-    _col_type_validation(metadata=metadata, measure=distribution_measure,
+    _col_type_validation(metadata=schema, measure=distribution_measure,
                          col_type='numeric')
-    _measure_validation(metadata=metadata, measure=distribution_measure)
+    _measure_validation(metadata=schema, measure=distribution_measure)
 
     if group_by:
-        _col_type_validation(metadata=metadata, measure=group_by,
+        _col_type_validation(metadata=schema, measure=group_by,
                              col_type='categorical')
-        _measure_validation(metadata=metadata, measure=group_by)
+        _measure_validation(metadata=schema, measure=group_by)
     else:
         md['legend'] = 'data'
         group_by = 'legend'
 
-    # jinja templating & JSON-ifying
-    J_ENV = jinja2.Environment(
-        loader=jinja2.PackageLoader('q2_vizard', 'assets/boxplot')
-    )
-    index = J_ENV.get_template('index.html')
+    # the boxes only need the distribution & grouping columns
+    md = _project_columns(md, md_ids, distribution_measure, group_by)
 
     # set default if box_orientation is None
     if box_orientation is None:
@@ -56,14 +127,8 @@ def boxplot(output_dir: str, metadata: Metadata,
     elif box_orientation == 'vertical':
         spec = 'verticalSpec.json'
 
-    spec_fp = pkg_resources.resource_filename(
-        'q2_vizard', os.path.join('assets', 'boxplot', spec)
-    )
-
-    with open(spec_fp) as fh:
-        json_obj = json.load(fh)
-
-    metadata_obj = json.loads(md.to_json(orient='records'))
+    # jinja templating & JSON-ifying
+    index, template = _load_assets('boxplot', spec)
 
     # outlier filtering expression pre-processing
     # this needs to be created as an f-string prior to being passed into
@@ -84,13 +149,45 @@ def boxplot(output_dir: str, metadata: Metadata,
         subtitle = \
             f'Whiskers were drawn using the `{whisker_range}` method.'
 
-    full_spec = _json_replace(json_obj, metadata=metadata_obj, md_ids=md_ids,
-                              distribution_measure=distribution_measure,
-                              whisker_range=whisker_range,
-                              group_by=group_by, title=title,
-                              expr=expr, subtitle=subtitle,
-                              box_orientation=box_orientation)
+    # box statistics & outliers are computed here rather than in vega,
+    # so only those (and not every value) are embedded in the spec
+    if precompute_summary:
+        template = template.derived(_summary_template)
+        summary, outliers = _box_summary(md, distribution_measure, group_by,
+                                         whisker_range)
+        data = {'summary': summary, 'outliers': outliers}
+        n_outliers = len(outliers)
+    else:
+        data = {'metadata': md}
+        # at most every value, unless the whiskers span all of them
+        n_outliers = 0 if whisker_range == 'minmax' else len(md)
+
+    # each box is drawn as its whisker, two caps, box and median line
+    n_marks = 5 * md[group_by].nunique(dropna=False) + n_outliers
+
+    return index, template, dict(
+        md_ids=md_ids,
+        distribution_measure=distribution_measure,
+        whisker_range=whisker_range,
+        group_by=group_by, title=title,
+        expr=expr, subtitle=subtitle,
+        box_orientation=box_orientation, **data), n_marks
+
 
-    with open(os.path.join(output_dir, 'index.html'), 'w') as fh:
-        spec_string = json.dumps(full_spec)
-        fh.write(index.render(spec=spec_string))
+def boxplot(output_dir: str, metadata: Metadata,
+            distribution_measure: NumericMetadataColumn,
+            group_by: CategoricalMetadataColumn = None,
+            whisker_range: str = 'percentile',
+            box_orientation: str = 'horizontal',
+            title: str = None,
+            precompute_summary: bool = False,
+            data_encoding: str = 'records',
+            renderer: str = 'auto'):
+
+    _render_planned(
+        output_dir, 'boxplot', _boxplot_spec, metadata,
+        dict(distribution_measure=distribution_measure, group_by=group_by,
+             whisker_range=whisker_range,
+             box_orientation=box_orientation, title=title,
+             precompute_summary=precompute_summary),
+        data_encoding=data_encoding, renderer=renderer)
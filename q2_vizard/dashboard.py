@@ -0,0 +1,171 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import json
+import secrets
+import functools
+
+from qiime2 import Metadata
+
+from .scatterplot import _scatterplot_2d_spec
+from .heatmap import _heatmap_spec
+from .lineplot import _lineplot_spec
+from .boxplot import _boxplot_spec
+from .batch import _plan_plots
+from ._cache import _metadata_cache_enabled, _metadata_dataframe
+from ._vendor import _runtime_scripts
+from ._render import (_get_jinja_env, _render_blocks, _write_spec,
+                      _choose_renderer,
+                      _DATA_WRITERS, _BLOCK_MARKER, _SIDECAR_ENCODING,
+                      _CHUNKED_ENCODING)
+
+
+_SPEC_FUNCTIONS = {
+    'scatterplot_2d': _scatterplot_2d_spec,
+    'heatmap': _heatmap_spec,
+    'lineplot': _lineplot_spec,
+    'boxplot': _boxplot_spec
+}
+
+
+def _shared_reference(base, df):
+    """
+    If `df` only holds rows & columns of `base` (in any order), and any
+    number of columns with a single constant value, return the reference to
+    them that the dashboard uses in place of embedding `df` again, otherwise
+    None.
+    """
+    if not df.index.is_unique or not df.index.isin(base.index).all():
+        return None
+
+    columns = []
+    constants = {}
+    for column in df.columns:
+        if column in base.columns:
+            columns.append(column)
+        elif len(df) and df[column].nunique(dropna=False) == 1:
+            # e.g. the `legend` column added when there's no `group_by`.
+            # serialized as it would be embedded, so that numpy scalars
+            # become JSON values and missing values become `null`
+            constants[column] = \
+                json.loads(df[column].iloc[:1].to_json(orient='values'))[0]
+        else:
+            return None
+
+    if not base.loc[df.index, columns].equals(df[columns]):
+        return None
+
+    if df.index.equals(base.index):
+        rows = None
+    else:
+        rows = base.index.get_indexer(df.index).tolist()
+
+    return {'encoding': 'shared', 'columns': columns, 'rows': rows,
+            'constants': constants}
+
+
+def _load_plots(plots):
+    """
+    Return `plots`, with any that are JSON objects (as they're given to the
+    `dashboard` action) parsed into dicts.
+    """
+    loaded = []
+    for idx, plot in enumerate(plots):
+        if isinstance(plot, str):
+            try:
+                plot = json.loads(plot)
+            except json.JSONDecodeError as e:
+                raise ValueError(f'Plot {idx} is not valid JSON: {e}') from e
+            if not isinstance(plot, dict):
+                raise ValueError(f'Plot {idx} must be a JSON object of the'
+                                 ' plot\'s parameters.')
+        loaded.append(plot)
+    return loaded
+
+
+def dashboard(output_dir: str, metadata: Metadata, plots: list,
+              title: str = None, data_encoding: str = 'records'):
+    """
+    Render every plot in `plots` (see `batch` for their format, or the JSON
+    object of one) from the same `metadata` onto a single page.
+
+    Any data that the plots take straight from `metadata` is embedded once,
+    in a block shared by all of them, and each plot is only drawn once it's
+    scrolled into view.
+    """
+    import pandas as pd
+
+    if data_encoding == _SIDECAR_ENCODING:
+        raise ValueError('A dashboard already embeds its data once, so the'
+                         f' `{_SIDECAR_ENCODING}` data encoding is not'
+                         ' supported.')
+    if data_encoding == _CHUNKED_ENCODING:
+        raise ValueError('A dashboard only draws each plot once it is'
+                         ' scrolled into view, so the'
+                         f' `{_CHUNKED_ENCODING}` data encoding is not'
+                         ' supported.')
+
+    planned = _plan_plots(_load_plots(plots), metadata)
+
+    for name, _, params in planned:
+        if 'data_encoding' in params:
+            raise ValueError(f'Plot `{name}` sets `data_encoding`, which'
+                             ' can only be set for the whole dashboard.')
+
+    with _metadata_cache_enabled():
+        base = _metadata_dataframe(metadata)
+
+        shared_columns = set()
+        views = []
+        for name, visualizer, params in planned:
+            params = dict(params)
+            renderer = params.pop('renderer', 'auto')
+
+            spec_function = _SPEC_FUNCTIONS[visualizer]
+            _, template, values, n_marks = spec_function(metadata, **params)
+
+            for param_name, value in values.items():
+                if not isinstance(value, pd.DataFrame):
+                    continue
+
+                reference = _shared_reference(base, value)
+                if reference is not None:
+                    shared_columns.update(reference['columns'])
+                    values[param_name] = reference
+
+            views.append((name, visualizer,
+                          _choose_renderer(renderer, n_marks),
+                          template, values))
+
+    # only the columns that some plot actually uses are shared (and no rows
+    # at all, if none of them use any)
+    shared = base[[column for column in base.columns
+                   if column in shared_columns]]
+    if not shared_columns:
+        shared = shared.iloc[:0]
+
+    writers = {
+        'data': functools.partial(_DATA_WRITERS[data_encoding], df=shared)
+    }
+    for idx, (_, _, _, template, values) in enumerate(views):
+        writers[f'spec-{idx}'] = functools.partial(
+            _write_spec, template=template, data_encoding=data_encoding,
+            **values)
+
+    nonce = secrets.token_hex(8)
+    index = _get_jinja_env().get_template('dashboard/index.html')
+    html = index.render(
+        title=title,
+        runtime=_runtime_scripts(output_dir, data_encoding),
+        data=_BLOCK_MARKER % (nonce, 'data'),
+        views=[(name, visualizer, renderer,
+                _BLOCK_MARKER % (nonce, f'spec-{idx}'))
+               for idx, (name, visualizer, renderer, _, _)
+               in enumerate(views)])
+
+    _render_blocks(output_dir, html, writers, nonce)
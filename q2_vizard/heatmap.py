@@ -6,53 +6,175 @@
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
 
-import os
-import jinja2
+import copy
 import json
-import pkg_resources
 
 from qiime2 import Metadata, MetadataColumn, NumericMetadataColumn
 
-from ._util import _json_replace, _col_type_validation, _measure_validation
+from ._util import (_SpecTemplate, _REPLACE_PARAM, _column_schema,
+                    _col_type_validation, _measure_validation,
+                    _project_columns)
+from ._cache import _metadata_dataframe
+from ._render import _load_assets
+from ._plan import _render_planned
 
 
-def heatmap(output_dir: str, metadata: Metadata,
-            x_measure: MetadataColumn,
-            y_measure: MetadataColumn,
-            gradient_measure: NumericMetadataColumn,
-            title: str = None):
+def _aggregate_cells(md, x_measure, y_measure, gradient_measure,
+                     aggregate_method):
+    """
+    Reduce `gradient_measure` to a single value per (x_measure, y_measure)
+    cell using `aggregate_method`, returning one row per cell.
+    """
+    # x_measure and y_measure are allowed to be the same column
+    cell_measures = list(dict.fromkeys([x_measure, y_measure]))
+
+    cells = md.groupby(cell_measures, sort=False, dropna=False)
+    return cells[gradient_measure].agg(aggregate_method).reset_index()
+
+
+def _band_domain(values, order):
+    """
+    Return the distinct `values` in the order that vega sorts the domain of a
+    band scale drawn from them (in which missing values sort lowest).
+    """
+    domain = values.drop_duplicates().dropna().sort_values().tolist()
+    if values.isna().any():
+        domain.insert(0, None)
+
+    if order == 'descending':
+        domain.reverse()
+    return domain
+
+
+def _embedded_values(column):
+    """
+    Return the numeric `column` with the values that the JSON data encodings
+    embed for it, which have at most 10 decimal places.
+    """
+    import pandas as pd
+
+    return pd.Series(json.loads(column.to_json(orient='values')),
+                     index=column.index, name=column.name, dtype='float64')
+
+
+def _domain_template(template):
+    """
+    Derive a spec template from a heatmap `template` where the scale domains
+    and the row/column counts are filled in directly, rather than computed
+    in Vega by scanning the `table` dataset.
+    """
+    spec = copy.deepcopy(template.json_obj)
+
+    # the row/column counts were the only use of these tables
+    spec['data'] = [data for data in spec['data']
+                    if data['name'] not in ('rowTable', 'columnTable')]
+
+    counts = {'nRows': 'n_rows', 'nColumns': 'n_columns'}
+    for signal in spec['signals']:
+        if signal['name'] in counts:
+            del signal['update']
+            signal['value'] = {_REPLACE_PARAM: counts[signal['name']]}
+
+    domains = {'x_scale': 'x_domain', 'y_scale': 'y_domain',
+               'color': 'gradient_domain'}
+    for scale in spec['scales']:
+        scale['domain'] = {_REPLACE_PARAM: domains[scale['name']]}
+
+    return _SpecTemplate(spec)
+
+
+def _heatmap_spec(metadata, x_measure, y_measure, gradient_measure,
+                  title=None, aggregate_method='none',
+                  precompute_domains=False):
+    """
+    Return the jinja `index.html` template, the `_SpecTemplate` and the
+    values to fill it with for a heatmap of `metadata`, along with the
+    (estimated) number of marks that it draws.
+    """
 
     # input handling for initial metadata
     md_ids = metadata.id_header
-    md = metadata.to_dataframe().reset_index()
+    schema = _column_schema(metadata)
+    md = _metadata_dataframe(metadata)
 
     # md validation for all input measures
     for measure in [x_measure, y_measure, gradient_measure]:
-        _measure_validation(metadata=metadata, measure=measure)
+        _measure_validation(metadata=schema, measure=measure)
 
     # col type validation for gradient_measure
-    _col_type_validation(metadata=metadata,
+    _col_type_validation(metadata=schema,
                          measure=gradient_measure,
                          col_type='numeric')
 
+    # collapsing all samples that fall within the same cell into one row,
+    # so that each cell is drawn once (rather than once per sample)
+    if aggregate_method not in [None, 'none']:
+        if gradient_measure in [x_measure, y_measure]:
+            raise ValueError(f'The same column `{gradient_measure}` has been'
+                             ' used for `gradient_measure` and `x_measure`'
+                             ' or `y_measure`, so it cannot be aggregated'
+                             ' per cell. Please choose different columns in'
+                             ' your metadata for these measures.')
+
+        md = _aggregate_cells(md, x_measure, y_measure, gradient_measure,
+                              aggregate_method)
+        subtitle = (f'Cells show the `{aggregate_method}` of'
+                    f' `{gradient_measure}` across the samples in each cell.')
+    else:
+        md = _project_columns(md, md_ids, x_measure, y_measure,
+                              gradient_measure)
+        subtitle = ' '
+
     # jinja templating & JSON-ifying
-    J_ENV = jinja2.Environment(
-        loader=jinja2.PackageLoader('q2_vizard', 'assets/heatmap')
-    )
-    index = J_ENV.get_template('index.html')
-
-    spec_fp = pkg_resources.resource_filename(
-        'q2_vizard', os.path.join('assets', 'heatmap', 'spec.json')
-    )
-    with open(spec_fp) as fh:
-        json_obj = json.load(fh)
-
-    metadata_obj = json.loads(md.to_json(orient='records'))
-
-    full_spec = _json_replace(json_obj, metadata=metadata_obj, md_ids=md_ids,
-                              x_measure=x_measure, y_measure=y_measure,
-                              gradient_measure=gradient_measure, title=title)
-
-    with open(os.path.join(output_dir, "index.html"), "w") as fh:
-        spec_string = json.dumps(full_spec)
-        fh.write(index.render(spec=spec_string))
+    index, template = _load_assets('heatmap')
+
+    # the scale domains (and so the number of rows & columns) are computed
+    # here rather than in vega, which would otherwise scan the whole table
+    if precompute_domains:
+        template = template.derived(_domain_template)
+
+        # vega only draws the cells whose values are in the domain, so
+        # numeric rows & columns are embedded with the precision of the JSON
+        # encodings (whatever the data encoding) to match it exactly
+        numeric = {measure: _embedded_values(md[measure])
+                   for measure in (x_measure, y_measure)
+                   if md[measure].dtype.kind == 'f'}
+        md = md.assign(**numeric)
+
+        x_domain = _band_domain(md[x_measure], 'ascending')
+        y_domain = _band_domain(md[y_measure], 'descending')
+
+        gradient = md[gradient_measure].dropna()
+        gradient_domain = \
+            gradient.agg(['min', 'max']).tolist() if len(gradient) else []
+
+        domains = dict(x_domain=x_domain, y_domain=y_domain,
+                       gradient_domain=gradient_domain,
+                       n_columns=len(x_domain), n_rows=len(y_domain))
+    else:
+        domains = {}
+
+    return index, template, dict(
+        metadata=md, md_ids=md_ids,
+        x_measure=x_measure, y_measure=y_measure,
+        gradient_measure=gradient_measure, title=title,
+        subtitle=subtitle, **domains), len(md)
+
+
+def heatmap(output_dir: str, metadata: Metadata,
+            x_measure: MetadataColumn,
+            y_measure: MetadataColumn,
+            gradient_measure: NumericMetadataColumn,
+            title: str = None,
+            aggregate_method: str = 'none',
+            precompute_domains: bool = False,
+            data_encoding: str = 'records',
+            renderer: str = 'auto'):
+
+    _render_planned(
+        output_dir, 'heatmap', _heatmap_spec, metadata,
+        dict(x_measure=x_measure, y_measure=y_measure,
+             gradient_measure=gradient_measure, title=title,
+             aggregate_method=aggregate_method,
+             precompute_domains=precompute_domains),
+        data_encoding=data_encoding, renderer=renderer)
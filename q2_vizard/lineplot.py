@@ -6,32 +6,32 @@
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
 
-import pandas as pd
-import os
-import json
-import pkg_resources
-import jinja2
-
 from qiime2 import Metadata, NumericMetadataColumn, CategoricalMetadataColumn
-from ._util import _json_replace, _measure_validation, _col_type_validation
+from ._util import (_column_schema, _measure_validation, _col_type_validation,
+                    _restrict_columns, _project_columns)
+from ._cache import _metadata_dataframe
+from ._render import _load_assets
+from ._plan import _render_planned
 
 
-def lineplot(output_dir: str, metadata: Metadata,
-             x_measure: NumericMetadataColumn,
-             y_measure: NumericMetadataColumn,
-             replicate_method: str = 'none',
-             group_by: CategoricalMetadataColumn = None,
-             title: str = None):
+def _lineplot_spec(metadata, x_measure, y_measure, replicate_method='none',
+                   group_by=None, title=None, columns=None):
+    """
+    Return the jinja `index.html` template, the `_SpecTemplate` and the
+    values to fill it with for a lineplot of `metadata`, along with the
+    (estimated) number of marks that it draws.
+    """
 
     # input handling for initial metadata
     md_ids = metadata.id_header
-    md = metadata.to_dataframe().reset_index()
+    schema = _column_schema(metadata)
+    md = _metadata_dataframe(metadata)
 
     # column validation for x_measure and y_measure
     for measure in [x_measure, y_measure]:
-        _col_type_validation(metadata=metadata, measure=measure,
+        _col_type_validation(metadata=schema, measure=measure,
                              col_type='numeric')
-        _measure_validation(metadata=metadata, measure=measure)
+        _measure_validation(metadata=schema, measure=measure)
 
     if y_measure == x_measure:
         raise ValueError(f'The same column `{x_measure}` has been used'
@@ -40,39 +40,46 @@ def lineplot(output_dir: str, metadata: Metadata,
                          ' metadata for these measures.')
 
     # filtering md cols for the y-axis dropdown
-    md_cols_numeric = \
-        metadata.filter_columns(column_type='numeric').to_dataframe()
-    md_cols_numeric = list(md_cols_numeric.columns)
+    md_cols_numeric = schema.of_type('numeric')
+    md_cols_numeric = _restrict_columns(schema, md_cols_numeric,
+                                        columns, [x_measure, y_measure])
 
     # column validation for grouping
     if group_by:
-        _col_type_validation(metadata=metadata, measure=group_by,
+        _col_type_validation(metadata=schema, measure=group_by,
                              col_type='categorical')
-        _measure_validation(metadata=metadata, measure=group_by)
+        _measure_validation(metadata=schema, measure=group_by)
+
+    # only the numeric columns available in the y-axis dropdown (and the
+    # grouping column) need to be embedded
+    md = _project_columns(md, md_ids, *md_cols_numeric,
+                          *([group_by] if group_by else []))
 
     if replicate_method == 'none':
         # handling for md sorting based on the selected group_by measure
         if group_by:
-            group_by_ordered_md = []
-            for i in md[group_by].unique():
-                group_by_md = md[md[group_by] == i].sort_values(x_measure)
-                if any(group_by_md[x_measure].duplicated()):
-                    raise ValueError(
-                        f'Replicates found in `{x_measure}` within the'
-                        f' `{i}` `group_by` group. If this is expected,'
-                        ' please select a `replicate_method`.'
-                        ' If this is not expected, please either filter out'
-                        f' replicates from `{x_measure}` or select a different'
-                        ' column in your metadata for use in the `x_measure`.')
-
-                group_by_ordered_md.append(group_by_md)
             # this creates md that's grouped by the group_by column and
             # sorted (per unique group_by value) by the x_measure
             # this is what's used to create the scatterplot points
             # line will be overlaid directly on these points since
             # there are no replicates to average
-            ordered_md = pd.concat(group_by_ordered_md)
+            ordered_md = md.dropna(subset=[group_by])
             ordered_md = ordered_md.sort_values(by=[group_by, x_measure])
+
+            replicates = ordered_md.duplicated(subset=[group_by, x_measure])
+            if replicates.any():
+                # report the first group (in metadata order) with replicates
+                replicate_groups = set(ordered_md.loc[replicates, group_by])
+                i = next(group for group in md[group_by].unique()
+                         if group in replicate_groups)
+                raise ValueError(
+                    f'Replicates found in `{x_measure}` within the'
+                    f' `{i}` `group_by` group. If this is expected,'
+                    ' please select a `replicate_method`.'
+                    ' If this is not expected, please either filter out'
+                    f' replicates from `{x_measure}` or select a different'
+                    ' column in your metadata for use in the `x_measure`.')
+
             # a bit of a hack but two separate tables are passed into vega
             # when we do have replicates, so it's easier to set what we'd
             # expect to be the second table to the ordered_md in this case
@@ -90,7 +97,7 @@ def lineplot(output_dir: str, metadata: Metadata,
             ordered_md = md.sort_values(x_measure)
             averaged_md = ordered_md
 
-            if any(ordered_md[x_measure].duplicated()):
+            if ordered_md[x_measure].duplicated().any():
                 raise ValueError(
                     f'Replicates found in `{x_measure}`.'
                     ' If this is expected, please select a `replicate_method`.'
@@ -100,69 +107,56 @@ def lineplot(output_dir: str, metadata: Metadata,
 
     # replicate handling when True
     elif replicate_method in ['median', 'mean']:
-
-        # handling for md sorting based on the selected group_by measure
-        if group_by:
-            group_by_ordered_md = []
-            for i in md[group_by].unique():
-                group_by_md = md[md[group_by] == i].sort_values(x_measure)
-                group_by_ordered_md.append(group_by_md)
-            # this creates md that's grouped by the group_by column and
-            # sorted (per unique group_by value) by the x_measure
-            # this is what's used to create the scatterplot points
-            ordered_md = pd.concat(group_by_ordered_md)
-            ordered_md = ordered_md.sort_values(by=[group_by, x_measure])
-
-        else:
+        if not group_by:
             # this adds a fake column with a single group that's used
             # in vega to render the legend and coloring when there
             # aren't multiple groups to create grouping with
             md['legend'] = 'data'
             group_by = 'legend'
 
-            ordered_md = md.sort_values(x_measure)
-
         # this creates a subset of the md grouped by the group_by column
         # y values at each unique x are averaged
         # this is used to create the average line
+        # (groupby sorts by its keys, so md doesn't need to be sorted first)
+        grouped_md = \
+            md.groupby([x_measure, group_by], as_index=False)[md_cols_numeric]
         if replicate_method == 'median':
-            averaged_md = \
-                (ordered_md.groupby([x_measure, group_by],
-                                    as_index=False)[md_cols_numeric].median())
+            averaged_md = grouped_md.median()
         elif replicate_method == 'mean':
-            averaged_md = \
-                (ordered_md.groupby([x_measure, group_by],
-                                    as_index=False)[md_cols_numeric].mean())
+            averaged_md = grouped_md.mean()
 
         averaged_md = averaged_md.sort_values(by=[group_by, x_measure])
 
     # jinja templating & JSON-ifying
-    J_ENV = jinja2.Environment(
-        loader=jinja2.PackageLoader('q2_vizard', 'assets/lineplot')
-    )
-    index = J_ENV.get_template('index.html')
-
-    spec_fp = pkg_resources.resource_filename(
-        'q2_vizard', os.path.join('assets', 'lineplot', 'spec.json')
-    )
-    with open(spec_fp) as fh:
-        json_obj = json.load(fh)
-
-    md_obj = json.loads(md.to_json(orient='records'))
-    averaged_md_obj = json.loads(averaged_md.to_json(orient='records'))
+    index, template = _load_assets('lineplot')
 
     if replicate_method in ['median', 'mean']:
         subtitle = f'Data was averaged using the `{replicate_method}` method.'
     else:
         subtitle = ' '
 
-    full_spec = \
-        _json_replace(json_obj, metadata=md_obj, md_ids=md_ids,
-                      averaged_metadata=averaged_md_obj,
-                      md_cols_numeric=md_cols_numeric,
-                      x_measure=x_measure, y_measure=y_measure,
-                      group_by=group_by, title=title, subtitle=subtitle)
+    return index, template, dict(
+        metadata=md, md_ids=md_ids,
+        averaged_metadata=averaged_md,
+        md_cols_numeric=md_cols_numeric,
+        x_measure=x_measure, y_measure=y_measure,
+        group_by=group_by, title=title, subtitle=subtitle), \
+        len(md) + averaged_md[group_by].nunique(dropna=False)
 
-    with open(os.path.join(output_dir, 'index.html'), 'w') as fh:
-        spec_string = json.dumps(full_spec)
-        fh.write(index.render(spec=spec_string))
+
+def lineplot(output_dir: str, metadata: Metadata,
+             x_measure: NumericMetadataColumn,
+             y_measure: NumericMetadataColumn,
+             replicate_method: str = 'none',
+             group_by: CategoricalMetadataColumn = None,
+             title: str = None,
+             columns: list = None,
+             data_encoding: str = 'records',
+             renderer: str = 'auto'):
+
+    _render_planned(
+        output_dir, 'lineplot', _lineplot_spec, metadata,
+        dict(x_measure=x_measure, y_measure=y_measure,
+             replicate_method=replicate_method, group_by=group_by,
+             title=title, columns=columns),
+        data_encoding=data_encoding, renderer=renderer)
@@ -6,12 +6,13 @@
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
 
-from qiime2.plugin import Plugin, Str, Metadata, Choices
+from qiime2.plugin import Plugin, Str, Bool, List, Metadata, Choices
 
 from q2_vizard.heatmap import heatmap
 from q2_vizard.scatterplot import scatterplot_2d
 from q2_vizard.lineplot import lineplot
 from q2_vizard.boxplot import boxplot
+from q2_vizard.dashboard import dashboard
 
 import q2_vizard._examples as ex
 
@@ -25,6 +26,55 @@ plugin = Plugin(name='vizard',
                 short_description='Generalized microbiome data visualization.')
 
 
+# parameters shared by every visualizer, which control how the data is
+# embedded in the rendered visualization
+render_parameters = {
+    'data_encoding': Str % Choices('records', 'columns', 'gzip', 'arrow',
+                                   'sidecar'),
+    'renderer': Str % Choices('auto', 'svg', 'canvas')
+}
+
+render_parameter_descriptions = {
+    'data_encoding': 'How the data is embedded in the visualization.'
+                     ' `records` (one JSON object per sample) and `columns`'
+                     ' (one JSON array per column, considerably smaller for'
+                     ' Metadata with many columns) are plain JSON. `gzip`'
+                     ' (compressed JSON records) and `arrow` (an Apache'
+                     ' Arrow table, which requires `pyarrow`) are binary'
+                     ' encodings that are much smaller for large Metadata,'
+                     ' and are decoded by the browser when the visualization'
+                     ' is opened. `sidecar` writes the data to separate JSON'
+                     ' files next to the (small) index.html, which are'
+                     ' loaded when the visualization is opened. This'
+                     ' requires the visualization to be served over HTTP'
+                     ' (e.g. by QIIME 2 View), since browsers block pages'
+                     ' opened from a local file from loading other files.',
+    'renderer': 'How the visualization is drawn. `svg` creates an element'
+                ' for every mark, which makes the browser slow to respond'
+                ' once there are many thousands of them, while `canvas`'
+                ' draws them all as a single image. `auto` chooses `canvas`'
+                ' when the visualization draws more than 10,000 marks, and'
+                ' `svg` otherwise.'
+}
+
+# the scatterplot & lineplot draw every sample, so they can also be drawn
+# progressively as their data is loaded
+progressive_render_parameters = {
+    **render_parameters,
+    'data_encoding': Str % Choices('records', 'columns', 'gzip', 'arrow',
+                                   'sidecar', 'chunked')
+}
+
+progressive_render_parameter_descriptions = {
+    **render_parameter_descriptions,
+    'data_encoding': render_parameter_descriptions['data_encoding'] +
+    ' `chunked` embeds the data as a series of JSON records blocks, which'
+    ' are drawn one after the other, so that the first samples appear'
+    ' right away on very large Metadata rather than after all of it is'
+    ' loaded.'
+}
+
+
 plugin.visualizers.register_function(
     function=heatmap,
     inputs={},
@@ -33,7 +83,11 @@ plugin.visualizers.register_function(
         'x_measure': Str,
         'y_measure': Str,
         'gradient_measure': Str,
-        'title': Str
+        'title': Str,
+        'aggregate_method': Str % Choices('none', 'mean', 'median', 'sum',
+                                          'count'),
+        'precompute_domains': Bool,
+        **render_parameters
     },
     parameter_descriptions={
         'metadata': 'Any metadata-like input that contains at least three'
@@ -45,7 +99,20 @@ plugin.visualizers.register_function(
         'gradient_measure': 'Numeric measure from the input Metadata that'
                             ' should be used to represent the color gradient'
                             ' in the heatmap.',
-        'title': 'The title of the heatmap.'},
+        'title': 'The title of the heatmap.',
+        'aggregate_method': 'The method for combining the `gradient_measure`'
+                            ' values of all samples that share the same'
+                            ' `x_measure` and `y_measure` values into a'
+                            ' single cell. Available methods are `mean`,'
+                            ' `median`, `sum` and `count`. By default, each'
+                            ' sample is drawn as its own cell.',
+        'precompute_domains': 'Compute the rows, columns and gradient range'
+                              ' of the heatmap up front, and embed them in'
+                              ' the visualization, rather than having the'
+                              ' browser derive them from every cell when it'
+                              ' is opened. This renders the same heatmap,'
+                              ' but opens faster for large Metadata.',
+        **render_parameter_descriptions},
     name='Heatmap',
     description='Basic heatmap for visualizing three Metadata measures.',
     examples={'heatmap': ex.heatmap}
@@ -60,7 +127,9 @@ plugin.visualizers.register_function(
         'x_measure': Str,
         'y_measure': Str,
         'color_by': Str,
-        'title': Str
+        'title': Str,
+        'columns': List[Str],
+        **progressive_render_parameters
     },
     parameter_descriptions={
         'metadata': 'Any metadata-like input with at least two'
@@ -71,7 +140,13 @@ plugin.visualizers.register_function(
                      ' plotted on the y-axis.',
         'color_by': 'Categorical measure from the input Metadata that'
                     ' should be used for color-coding the scatterplot.',
-        'title': 'The title of the scatterplot.'},
+        'title': 'The title of the scatterplot.',
+        'columns': 'The Metadata columns to make available in the'
+                   ' visualization. Only these columns (along with any'
+                   ' chosen measures) will be offered in the drop-downs'
+                   ' and embedded in the visualization. By default, all'
+                   ' columns are included.',
+        **progressive_render_parameter_descriptions},
     name='2D Scatterplot',
     description='Basic 2D scatterplot for visualizing two numeric Metadata'
                 ' measures with optional categorical color grouping.',
@@ -89,7 +164,9 @@ plugin.visualizers.register_function(
         'y_measure': Str,
         'replicate_method': Str % Choices('none', 'median', 'mean'),
         'group_by': Str,
-        'title': Str
+        'title': Str,
+        'columns': List[Str],
+        **progressive_render_parameters
     },
     parameter_descriptions={
         'metadata': 'Any metadata-like input with at least two'
@@ -103,7 +180,13 @@ plugin.visualizers.register_function(
                             ' Available methods are `median` and `mean`.',
         'group_by': 'Categorical measure from the input Metadata that'
                     ' should be used for grouping the lineplot.',
-        'title': 'The title of the lineplot.'},
+        'title': 'The title of the lineplot.',
+        'columns': 'The numeric Metadata columns to make available on the'
+                   ' Y-axis. Only these columns (along with the chosen'
+                   ' measures) will be offered in the drop-down and'
+                   ' embedded in the visualization. By default, all'
+                   ' numeric columns are included.',
+        **progressive_render_parameter_descriptions},
     name='Lineplot',
     description='Basic lineplot for visualizing two numeric Metadata'
                 ' measures with optional grouping. All numeric columns present'
@@ -131,7 +214,9 @@ plugin.visualizers.register_function(
         'group_by': Str,
         'whisker_range': Str % Choices('tukeys_iqr', 'percentile', 'minmax'),
         'box_orientation': Str % Choices('horizontal', 'vertical'),
-        'title': Str
+        'title': Str,
+        'precompute_summary': Bool,
+        **render_parameters
     },
     name='Boxplot',
     description='Basic boxplot for visualizing a numeric Metadata measure'
@@ -156,6 +241,45 @@ plugin.visualizers.register_function(
                          ' on the rendered visualization.',
         'box_orientation': 'The visual orientataion of the boxes (either'
                            ' horizontal or vertical).',
-        'title': 'The title of the boxplot.'
+        'title': 'The title of the boxplot.',
+        'precompute_summary': 'Compute the box statistics and outliers'
+                              ' up front, and embed only those in the'
+                              ' visualization instead of every value in'
+                              ' `distribution_measure`. This renders the'
+                              ' same boxes, but keeps the visualization'
+                              ' small and fast to open for large Metadata.',
+        **render_parameter_descriptions
     }
 )
+
+
+plugin.visualizers.register_function(
+    function=dashboard,
+    inputs={},
+    parameters={
+        'metadata': Metadata,
+        'plots': List[Str],
+        'title': Str,
+        'data_encoding': Str % Choices('records', 'columns', 'gzip',
+                                       'arrow')
+    },
+    parameter_descriptions={
+        'metadata': 'Any metadata-like input to draw every plot from.',
+        'plots': 'The plots to draw, in order, each given as a JSON object'
+                 ' with a `visualizer` (`scatterplot_2d`, `heatmap`,'
+                 ' `lineplot` or `boxplot`), an optional `name` to head the'
+                 ' plot with, and the parameters of that visualizer, e.g.'
+                 ' `{"visualizer": "boxplot", "distribution_measure":'
+                 ' "shannon", "group_by": "body-site"}`. A plot may also set'
+                 ' its own `renderer`.',
+        'title': 'The title of the dashboard.',
+        'data_encoding': 'How the data is embedded in the dashboard (see'
+                         ' the `data_encoding` of each visualizer). Plots'
+                         ' cannot set their own, since they share the'
+                         ' embedded data.'
+    },
+    name='Dashboard',
+    description='Several plots of the same Metadata on a single page, which'
+                ' embeds the Metadata that they share once, and draws each'
+                ' plot as it is scrolled into view.'
+)
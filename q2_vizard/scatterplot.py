@@ -6,89 +6,105 @@
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
 
-import os
-import json
-import pkg_resources
-import jinja2
-
 from qiime2 import Metadata, NumericMetadataColumn, CategoricalMetadataColumn
-from ._util import _json_replace, _col_type_validation, _measure_validation
+from ._util import (_column_schema, _col_type_validation, _measure_validation,
+                    _restrict_columns, _project_columns)
+from ._cache import _metadata_dataframe
+from ._render import _load_assets
+from ._plan import _render_planned
 
 
-def scatterplot_2d(output_dir: str, metadata: Metadata,
-                   x_measure: NumericMetadataColumn = None,
-                   y_measure: NumericMetadataColumn = None,
-                   color_by: CategoricalMetadataColumn = None,
-                   title: str = None):
+def _scatterplot_2d_spec(metadata, x_measure=None, y_measure=None,
+                         color_by=None, title=None, columns=None):
+    """
+    Return the jinja `index.html` template, the `_SpecTemplate` and the
+    values to fill it with for a scatterplot of `metadata`, along with the
+    (estimated) number of marks that it draws.
+    """
 
     # input handling for initial metadata
     md_ids = metadata.id_header
-    md = metadata.to_dataframe().reset_index()
-    md['legendDefault'] = 'data'
+    schema = _column_schema(metadata)
+    md = _metadata_dataframe(metadata)
 
     # handling categorical columns for color grouping
-    md_cols_categorical = \
-        metadata.filter_columns(column_type='categorical').to_dataframe()
-    md_cols_categorical = list(md_cols_categorical.columns)
+    md_cols_categorical = schema.of_type('categorical')
 
     # validation for group measure
     if color_by:
-        _measure_validation(metadata=metadata, measure=color_by)
-        _col_type_validation(metadata=metadata, measure=color_by,
+        _measure_validation(metadata=schema, measure=color_by)
+        _col_type_validation(metadata=schema, measure=color_by,
                              col_type='categorical')
 
+    md_cols_categorical = _restrict_columns(schema, md_cols_categorical,
+                                            columns, [color_by])
+
     # setting default (or selected) group measure for color-coding
-    # and adding 'legendDefault' for removing color-coding
-    md_cols_categorical.append('legendDefault')
+    # and adding 'legendDefault' for removing color-coding (which the spec
+    # adds to the table, so that it isn't embedded once per sample)
+    color_by_options = md_cols_categorical + ['legendDefault']
     if color_by:
         group_dropdown_default = color_by
     else:
         group_dropdown_default = 'legendDefault'
 
     # handling numeric columns for x/y plotting
-    md_cols_numeric = \
-        metadata.filter_columns(column_type='numeric').to_dataframe()
-    md_cols_numeric = list(md_cols_numeric.columns)
+    md_cols_numeric = schema.of_type('numeric')
+    md_cols_numeric = _restrict_columns(schema, md_cols_numeric,
+                                        columns, [x_measure, y_measure])
+
+    if not md_cols_numeric:
+        if columns is None:
+            provided = 'The Metadata has no numeric columns.'
+        else:
+            provided = 'None of the provided `columns` are numeric.'
+        raise ValueError(f'{provided} At least one numeric column is'
+                         ' required for the x and y axes.')
 
     # validation for x/y measures
     if x_measure:
-        _measure_validation(metadata=metadata, measure=x_measure)
-        _col_type_validation(metadata=metadata, measure=x_measure,
+        _measure_validation(metadata=schema, measure=x_measure)
+        _col_type_validation(metadata=schema, measure=x_measure,
                              col_type='numeric')
         x_dropdown_default = x_measure
     else:
         x_dropdown_default = md_cols_numeric[0]
 
     if y_measure:
-        _measure_validation(metadata=metadata, measure=y_measure)
-        _col_type_validation(metadata=metadata, measure=y_measure,
+        _measure_validation(metadata=schema, measure=y_measure)
+        _col_type_validation(metadata=schema, measure=y_measure,
                              col_type='numeric')
         y_dropdown_default = y_measure
     else:
         y_dropdown_default = md_cols_numeric[0]
 
+    # only the columns available in the dropdowns need to be embedded
+    md = _project_columns(md, md_ids, *md_cols_numeric, *md_cols_categorical)
+
     # jinja templating & JSON-ifying
-    J_ENV = jinja2.Environment(
-        loader=jinja2.PackageLoader('q2_vizard', 'assets/scatterplot_2d')
-    )
-    index = J_ENV.get_template('index.html')
-
-    spec_fp = pkg_resources.resource_filename(
-        'q2_vizard', os.path.join('assets', 'scatterplot_2d', 'spec.json')
-    )
-    with open(spec_fp) as fh:
-        json_obj = json.load(fh)
-
-    metadata_obj = json.loads(md.to_json(orient='records'))
-
-    full_spec = _json_replace(json_obj, metadata=metadata_obj, md_ids=md_ids,
-                              md_cols_numeric=md_cols_numeric,
-                              x_dropdown_default=x_dropdown_default,
-                              y_dropdown_default=y_dropdown_default,
-                              md_cols_categorical=md_cols_categorical,
-                              group_dropdown_default=group_dropdown_default,
-                              title=title)
-
-    with open(os.path.join(output_dir, 'index.html'), 'w') as fh:
-        spec_string = json.dumps(full_spec)
-        fh.write(index.render(spec=spec_string))
+    index, template = _load_assets('scatterplot_2d')
+
+    return index, template, dict(
+        metadata=md, md_ids=md_ids,
+        md_cols_numeric=md_cols_numeric,
+        x_dropdown_default=x_dropdown_default,
+        y_dropdown_default=y_dropdown_default,
+        md_cols_categorical=color_by_options,
+        group_dropdown_default=group_dropdown_default,
+        title=title, subtitle=' '), len(md)
+
+
+def scatterplot_2d(output_dir: str, metadata: Metadata,
+                   x_measure: NumericMetadataColumn = None,
+                   y_measure: NumericMetadataColumn = None,
+                   color_by: CategoricalMetadataColumn = None,
+                   title: str = None,
+                   columns: list = None,
+                   data_encoding: str = 'records',
+                   renderer: str = 'auto'):
+
+    _render_planned(
+        output_dir, 'scatterplot_2d', _scatterplot_2d_spec, metadata,
+        dict(x_measure=x_measure, y_measure=y_measure, color_by=color_by,
+             title=title, columns=columns),
+        data_encoding=data_encoding, renderer=renderer)
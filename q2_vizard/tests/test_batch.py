@@ -0,0 +1,163 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import tempfile
+from unittest import mock
+
+import pandas as pd
+
+from qiime2 import Metadata
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_vizard.batch import batch
+from q2_vizard._cache import _METADATA_CACHE
+
+
+class TestBatch(TestPluginBase):
+    package = 'q2_vizard.tests'
+
+    def setUp(self):
+        super().setUp()
+
+        md_index = pd.Index(['sample1', 'sample2', 'sample3', 'sample4'],
+                            name='sample-id')
+        self.md = Metadata(pd.DataFrame(
+            {'A': [1.0, 2.0, 3.0, 4.0],
+             'B': [4.0, 2.0, 3.0, 1.0],
+             'group': ['foo', 'foo', 'bar', 'bar']}, index=md_index))
+
+        self.plots = [
+            {'visualizer': 'boxplot', 'distribution_measure': 'A',
+             'group_by': 'group'},
+            {'visualizer': 'boxplot', 'name': 'B-by-group',
+             'distribution_measure': 'B', 'group_by': 'group'},
+            {'visualizer': 'scatterplot_2d', 'x_measure': 'A',
+             'y_measure': 'B'},
+            {'visualizer': 'heatmap', 'x_measure': 'group', 'y_measure': 'A',
+             'gradient_measure': 'B'}
+        ]
+
+    def test_batch(self):
+        with tempfile.TemporaryDirectory() as output_dir, \
+                mock.patch.object(Metadata, 'to_dataframe',
+                                  wraps=self.md.to_dataframe) as to_df:
+            batch(output_dir, self.md, self.plots)
+
+            exp_names = ['000-boxplot', 'B-by-group', '002-scatterplot_2d',
+                         '003-heatmap']
+            for name in exp_names:
+                self.assertTrue(os.path.exists(
+                    os.path.join(output_dir, name, 'index.html')))
+
+            with open(os.path.join(output_dir, 'index.html')) as fh:
+                index = fh.read()
+            for name in exp_names:
+                self.assertIn(f'href="{name}/index.html"', index)
+
+        # converted once for the whole batch, and not kept around after
+        to_df.assert_called_once()
+        self.assertEqual(len(_METADATA_CACHE), 0)
+
+    def test_batch_parallel(self):
+        def read_outputs(output_dir):
+            outputs = {}
+            for name in os.listdir(output_dir):
+                fp = os.path.join(output_dir, name, 'index.html')
+                if name != 'index.html':
+                    with open(fp) as fh:
+                        outputs[name] = fh.read()
+            return outputs
+
+        with tempfile.TemporaryDirectory() as serial_dir, \
+                tempfile.TemporaryDirectory() as parallel_dir:
+            batch(serial_dir, self.md, self.plots)
+            batch(parallel_dir, self.md, self.plots, n_jobs=2)
+
+            exp = read_outputs(serial_dir)
+            obs = read_outputs(parallel_dir)
+
+        self.assertEqual(len(obs), 4)
+        self.assertEqual(obs, exp)
+        self.assertEqual(len(_METADATA_CACHE), 0)
+
+    def test_batch_parallel_error(self):
+        self.plots[3]['gradient_measure'] = 'group'
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with self.assertRaisesRegex(TypeError, '`group` not of type'):
+                batch(output_dir, self.md, self.plots, n_jobs=2)
+
+    def test_invalid_n_jobs(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            with self.assertRaisesRegex(ValueError, '`n_jobs` must be at'):
+                batch(output_dir, self.md, self.plots, n_jobs=0)
+
+    def test_unknown_visualizer(self):
+        self.plots.append({'visualizer': 'piechart'})
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with self.assertRaisesRegex(ValueError,
+                                        'Plot 4.*unknown.*`piechart`'):
+                batch(output_dir, self.md, self.plots)
+
+            # nothing is rendered when any of the plots are invalid
+            self.assertEqual(os.listdir(output_dir), [])
+
+    def test_duplicate_name(self):
+        self.plots[0]['name'] = 'B-by-group'
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with self.assertRaisesRegex(ValueError,
+                                        'More than one.*`B-by-group`'):
+                batch(output_dir, self.md, self.plots)
+
+    def test_invalid_name(self):
+        self.plots[0]['name'] = os.path.join('..', 'escaped')
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with self.assertRaisesRegex(ValueError, 'cannot be used as a'
+                                                    ' directory name'):
+                batch(output_dir, self.md, self.plots)
+
+    def test_invalid_params(self):
+        self.plots[2]['colour_by'] = 'group'
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with self.assertRaisesRegex(ValueError, 'Invalid parameters.*'
+                                                    '002-scatterplot_2d'):
+                batch(output_dir, self.md, self.plots)
+
+    def test_non_str_name(self):
+        self.plots[0]['name'] = 1
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with self.assertRaisesRegex(ValueError, 'Plot name `1` cannot be'
+                                                    ' used as a directory'):
+                batch(output_dir, self.md, self.plots)
+
+    def test_invalid_measures(self):
+        self.plots[3]['gradient_measure'] = 'C'
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with self.assertRaisesRegex(ValueError,
+                                        'Invalid `gradient_measure`.*'
+                                        '003-heatmap.*`C` not found'):
+                batch(output_dir, self.md, self.plots)
+
+            # the measures are checked before any plot is rendered
+            self.assertEqual(os.listdir(output_dir), [])
+
+        self.plots[3]['gradient_measure'] = 'group'
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with self.assertRaisesRegex(TypeError,
+                                        'Invalid `gradient_measure`.*'
+                                        '`group` not of type'):
+                batch(output_dir, self.md, self.plots)
+            self.assertEqual(os.listdir(output_dir), [])
@@ -19,6 +19,7 @@ from qiime2.plugin.testing import TestPluginBase
 from qiime2 import Metadata
 
 from q2_vizard import boxplot
+from q2_vizard.boxplot import _box_summary, _boxplot_spec
 
 
 class TestBase(TestPluginBase):
@@ -41,14 +42,15 @@ class TestBase(TestPluginBase):
     def _selenium_boxplot_test(
         self, driver, distribution_measure, group_by, box_orientation,
         exp_legend, whisker_range, exp_total_outlier_marks_len,
-        exp_single_box_outlier_marks_len
+        exp_single_box_outlier_marks_len, precompute_summary=False
     ):
         with tempfile.TemporaryDirectory() as output_dir:
             boxplot(
                 output_dir=output_dir, metadata=self.md,
                 distribution_measure=distribution_measure,
                 group_by=group_by, box_orientation=box_orientation,
-                whisker_range=whisker_range
+                whisker_range=whisker_range,
+                precompute_summary=precompute_summary
             )
 
             # set defaults if None - for use in test validation
@@ -388,21 +390,24 @@ class TestBase(TestPluginBase):
                  box_orientation, exp_legend, whisker_range,
                  exp_total_outlier_marks_len,
                  exp_single_box_outlier_marks_len) in self.test_cases:
-
-                with self.subTest(
-                    distribution_measure=distribution_measure,
-                    group_by=group_by, box_orientation=box_orientation,
-                    exp_legend=exp_legend, whisker_range=whisker_range,
-                    exp_total_outlier_marks_len=exp_total_outlier_marks_len,
-                    exp_single_box_outlier_marks_len=(
-                        exp_single_box_outlier_marks_len)
-                ):
-
-                    self._selenium_boxplot_test(
-                        driver, distribution_measure, group_by,
-                        box_orientation, exp_legend, whisker_range,
-                        exp_total_outlier_marks_len,
-                        exp_single_box_outlier_marks_len)
+                for precompute_summary in [False, True]:
+                    with self.subTest(
+                        distribution_measure=distribution_measure,
+                        group_by=group_by, box_orientation=box_orientation,
+                        exp_legend=exp_legend, whisker_range=whisker_range,
+                        exp_total_outlier_marks_len=(
+                            exp_total_outlier_marks_len),
+                        exp_single_box_outlier_marks_len=(
+                            exp_single_box_outlier_marks_len),
+                        precompute_summary=precompute_summary
+                    ):
+
+                        self._selenium_boxplot_test(
+                            driver, distribution_measure, group_by,
+                            box_orientation, exp_legend, whisker_range,
+                            exp_total_outlier_marks_len,
+                            exp_single_box_outlier_marks_len,
+                            precompute_summary)
 
     # run selenium tests using a headless firefox driver
     def test_boxplot_firefox(self):
@@ -416,18 +421,127 @@ class TestBase(TestPluginBase):
                  box_orientation, exp_legend, whisker_range,
                  exp_total_outlier_marks_len,
                  exp_single_box_outlier_marks_len) in self.test_cases:
+                for precompute_summary in [False, True]:
+                    with self.subTest(
+                        distribution_measure=distribution_measure,
+                        group_by=group_by, box_orientation=box_orientation,
+                        exp_legend=exp_legend, whisker_range=whisker_range,
+                        exp_total_outlier_marks_len=(
+                            exp_total_outlier_marks_len),
+                        exp_single_box_outlier_marks_len=(
+                            exp_single_box_outlier_marks_len),
+                        precompute_summary=precompute_summary
+                    ):
+
+                        self._selenium_boxplot_test(
+                            driver, distribution_measure, group_by,
+                            box_orientation, exp_legend, whisker_range,
+                            exp_total_outlier_marks_len,
+                            exp_single_box_outlier_marks_len,
+                            precompute_summary)
+
+    # the marks drawn on a canvas are annotated on hidden stand-in elements
+    def _selenium_canvas_test(self, driver):
+        with tempfile.TemporaryDirectory() as output_dir:
+            boxplot(output_dir=output_dir, metadata=self.md,
+                    distribution_measure='x', group_by='group',
+                    renderer='canvas')
+
+            driver.get(f"file://{os.path.join(output_dir, 'index.html')}")
+
+            self.assertEqual(
+                len(driver.find_elements(By.CSS_SELECTOR, '#viz canvas')), 1)
+
+            boxes = driver.find_elements(
+                By.CSS_SELECTOR, '#canvas-marks [aria-label="boxGroup"]')
+            self.assertEqual([box.get_attribute('data-group')
+                              for box in boxes], ['aa', 'bb', 'cc'])
+
+            outliers = driver.find_elements(
+                By.CSS_SELECTOR, '#canvas-marks [aria-label="outlierMark"]')
+            self.assertEqual(sorted(outlier.get_attribute('data-id')
+                                    for outlier in outliers),
+                             ['sample03', 'sample17', 'sample18'])
+
+    def test_boxplot_canvas_chrome(self):
+        chrome_options = ChromeOptions()
+        chrome_options.add_argument('-headless')
+
+        with webdriver.Chrome(options=chrome_options) as driver:
+            self._selenium_canvas_test(driver)
+
+    def test_boxplot_canvas_firefox(self):
+        firefox_options = FirefoxOptions()
+        firefox_options.add_argument('-headless')
+
+        with webdriver.Firefox(options=firefox_options) as driver:
+            self._selenium_canvas_test(driver)
+
+
+class TestBoxSummary(TestPluginBase):
+    package = 'q2_vizard.tests'
+
+    def setUp(self):
+        super().setUp()
+
+        self.md = Metadata.load(self.get_data_path('sample-md.tsv'))
 
-                with self.subTest(
-                    distribution_measure=distribution_measure,
-                    group_by=group_by, box_orientation=box_orientation,
-                    exp_legend=exp_legend, whisker_range=whisker_range,
-                    exp_total_outlier_marks_len=exp_total_outlier_marks_len,
-                    exp_single_box_outlier_marks_len=(
-                        exp_single_box_outlier_marks_len)
-                ):
-
-                    self._selenium_boxplot_test(
-                        driver, distribution_measure, group_by,
-                        box_orientation, exp_legend, whisker_range,
-                        exp_total_outlier_marks_len,
-                        exp_single_box_outlier_marks_len)
+    def test_box_summary_matches_numpy(self):
+        md = self.md.to_dataframe().reset_index()
+
+        for whisker_range in ['tukeys_iqr', 'percentile', 'minmax']:
+            with self.subTest(whisker_range=whisker_range):
+                summary, outliers = _box_summary(md, 'x', 'group',
+                                                 whisker_range)
+
+                # groups are kept in order of first appearance
+                self.assertEqual(list(summary['group']), ['aa', 'bb', 'cc'])
+
+                for _, row in summary.iterrows():
+                    values = md.loc[md['group'] == row['group'], 'x']
+                    q1, median, q3, p09, p91 = \
+                        np.percentile(values, [25, 50, 75, 9, 91])
+
+                    self.assertAlmostEqual(row['q1'], q1)
+                    self.assertAlmostEqual(row['median'], median)
+                    self.assertAlmostEqual(row['q3'], q3)
+                    self.assertAlmostEqual(row['p09'], p09)
+                    self.assertAlmostEqual(row['p91'], p91)
+                    self.assertEqual(row['min'], values.min())
+                    self.assertEqual(row['max'], values.max())
+
+                    group_outliers = \
+                        outliers.loc[outliers['group'] == row['group'], 'x']
+                    exp_outliers = values[(values < row['whiskerLow']) |
+                                          (values > row['whiskerHigh'])]
+                    self.assertEqual(sorted(group_outliers),
+                                     sorted(exp_outliers))
+
+    def test_box_summary_whiskers(self):
+        md = self.md.to_dataframe().reset_index()
+
+        summary, outliers = _box_summary(md, 'x', 'group', 'percentile')
+        self.assertEqual(list(summary['whiskerLow']),
+                         list(summary['p09']))
+        self.assertEqual(list(outliers['sample_name']),
+                         ['sample03', 'sample17', 'sample18'])
+
+        summary, outliers = _box_summary(md, 'x', 'group', 'minmax')
+        self.assertEqual(list(summary['whiskerHigh']),
+                         list(summary['max']))
+        self.assertEqual(len(outliers), 0)
+
+    def test_boxplot_spec_n_marks(self):
+        # five marks per box, plus each outlier
+        *_, n_marks = _boxplot_spec(self.md, 'x', group_by='group',
+                                    precompute_summary=True)
+        self.assertEqual(n_marks, 5 * 3 + 3)
+
+        # without the summary, any value might be an outlier...
+        *_, n_marks = _boxplot_spec(self.md, 'x', group_by='group')
+        self.assertEqual(n_marks, 5 * 3 + self.md.id_count)
+
+        # ...unless the whiskers span all of them
+        *_, n_marks = _boxplot_spec(self.md, 'x', group_by='group',
+                                    whisker_range='minmax')
+        self.assertEqual(n_marks, 5 * 3)
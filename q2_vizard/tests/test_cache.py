@@ -0,0 +1,132 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import gc
+import io
+import os
+from unittest import mock
+
+import pandas as pd
+
+from qiime2.plugin.testing import TestPluginBase
+from qiime2 import Metadata
+
+from .._cache import (_metadata_dataframe, _write_cached,
+                      _clear_metadata_cache, _METADATA_CACHE,
+                      _METADATA_CACHE_ENV_VAR)
+from .._render import _write_records
+from .._util import _project_columns
+
+
+class TestBase(TestPluginBase):
+    package = 'q2_vizard.tests'
+
+    def setUp(self):
+        super().setUp()
+        _clear_metadata_cache()
+
+        index = pd.Index(['sample1', 'sample2', 'sample3'],
+                         name='sample-id')
+        self.md = Metadata(pd.DataFrame(
+            {'numeric-col': [1.0, 2.0, 3.0],
+             'categorical-col': ['foo', 'bar', 'baz']}, index=index))
+
+    def tearDown(self):
+        _clear_metadata_cache()
+        super().tearDown()
+
+    def enable_cache(self, size=8):
+        return mock.patch.dict(os.environ,
+                               {_METADATA_CACHE_ENV_VAR: str(size)})
+
+
+class TestMetadataDataFrame(TestBase):
+    def test_cache_disabled_by_default(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop(_METADATA_CACHE_ENV_VAR, None)
+            obs = _metadata_dataframe(self.md)
+
+        pd.testing.assert_frame_equal(
+            obs, self.md.to_dataframe().reset_index())
+        self.assertEqual(len(_METADATA_CACHE), 0)
+
+    def test_dataframe_built_once(self):
+        with self.enable_cache(), \
+                mock.patch.object(Metadata, 'to_dataframe',
+                                  wraps=self.md.to_dataframe) as to_df:
+            df1 = _metadata_dataframe(self.md)
+            df2 = _metadata_dataframe(self.md)
+
+        to_df.assert_called_once()
+        self.assertIsNot(df1, df2)
+        pd.testing.assert_frame_equal(df1, df2)
+
+    def test_added_columns_not_shared(self):
+        with self.enable_cache():
+            df1 = _metadata_dataframe(self.md)
+            df1['legend'] = 'data'
+            df2 = _metadata_dataframe(self.md)
+
+        self.assertNotIn('legend', df2.columns)
+
+    def test_cache_bounded(self):
+        other = Metadata(self.md.to_dataframe().iloc[:1])
+
+        with self.enable_cache(size=1):
+            _metadata_dataframe(self.md)
+            _metadata_dataframe(other)
+
+        self.assertEqual(list(_METADATA_CACHE), [id(other)])
+
+    def test_entry_dropped_with_metadata(self):
+        other = Metadata(self.md.to_dataframe().iloc[:1])
+
+        with self.enable_cache():
+            _metadata_dataframe(other)
+            self.assertIn(id(other), _METADATA_CACHE)
+
+            key = id(other)
+            del other
+            gc.collect()
+
+        self.assertNotIn(key, _METADATA_CACHE)
+
+
+class TestWriteCached(TestBase):
+    def write(self, df, write_data):
+        fh = io.StringIO()
+        _write_cached(fh, df, 'records', write_data)
+        return fh.getvalue()
+
+    def test_projection_serialized_once(self):
+        write_data = mock.Mock(wraps=_write_records)
+
+        with self.enable_cache():
+            for _ in range(2):
+                df = _metadata_dataframe(self.md)
+                df = _project_columns(df, 'sample-id', 'numeric-col')
+                obs = self.write(df, write_data)
+
+        write_data.assert_called_once()
+        self.assertEqual(obs, df.to_json(orient='records'))
+
+    def test_modified_frame_not_cached(self):
+        write_data = mock.Mock(wraps=_write_records)
+
+        with self.enable_cache():
+            for _ in range(2):
+                df = _metadata_dataframe(self.md)
+                df['legend'] = 'data'
+                obs = self.write(df, write_data)
+
+            df = _project_columns(_metadata_dataframe(self.md), 'sample-id')
+            self.write(df.sort_values('sample-id', ascending=False),
+                       write_data)
+
+        self.assertEqual(write_data.call_count, 3)
+        self.assertIn('"legend":"data"', obs)
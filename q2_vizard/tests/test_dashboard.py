@@ -0,0 +1,231 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import re
+import json
+import tempfile
+
+import numpy as np
+import pandas as pd
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+from selenium.webdriver.support.ui import WebDriverWait
+
+from qiime2 import Metadata
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_vizard.dashboard import dashboard, _shared_reference
+
+
+class TestDashboard(TestPluginBase):
+    package = 'q2_vizard.tests'
+
+    def setUp(self):
+        super().setUp()
+
+        md_index = pd.Index(['sample1', 'sample2', 'sample3', 'sample4'],
+                            name='sample-id')
+        self.md = Metadata(pd.DataFrame(
+            {'A': [1.0, 2.0, 3.0, 4.0],
+             'B': [4.0, 2.0, 3.0, 1.0],
+             'C': [1.0, 1.0, 2.0, 2.0],
+             'group': ['foo', 'bar', 'foo', 'bar'],
+             'unused': ['a', 'b', 'c', 'd']}, index=md_index))
+
+        self.plots = [
+            {'visualizer': 'scatterplot_2d', 'x_measure': 'A',
+             'y_measure': 'B', 'color_by': 'group', 'columns': []},
+            {'visualizer': 'boxplot', 'distribution_measure': 'A',
+             'group_by': 'group'},
+            {'visualizer': 'lineplot', 'x_measure': 'B', 'y_measure': 'A',
+             'group_by': 'group', 'columns': []},
+            {'visualizer': 'lineplot', 'name': 'averaged', 'x_measure': 'C',
+             'y_measure': 'B', 'replicate_method': 'median',
+             'columns': []}
+        ]
+
+    def render(self, plots, **kwargs):
+        with tempfile.TemporaryDirectory() as output_dir:
+            dashboard(output_dir, self.md, plots, **kwargs)
+            with open(os.path.join(output_dir, 'index.html')) as fh:
+                html = fh.read()
+
+        blocks = dict(re.findall(
+            r'<script type="application/json" id="(.*?)">(.*?)</script>',
+            html, re.S))
+        return html, {id_: json.loads(block)
+                      for id_, block in blocks.items()}
+
+    def test_dashboard(self):
+        html, blocks = self.render(self.plots, title='Samples')
+
+        # each sample is embedded once, in the shared data
+        self.assertEqual(html.count('"sample1"'), 1)
+        self.assertEqual(
+            blocks['data'],
+            json.loads(self.md.to_dataframe().reset_index()
+                       [['sample-id', 'A', 'B', 'C', 'group']]
+                       .to_json(orient='records')))
+        self.assertEqual(set(blocks), {'data', 'spec-0', 'spec-1',
+                                       'spec-2', 'spec-3'})
+
+        scatter = blocks['spec-0']['data'][0]['values']
+        self.assertEqual(scatter, {'encoding': 'shared', 'rows': None,
+                                   'columns': ['sample-id', 'A', 'B',
+                                               'group'],
+                                   'constants': {}})
+
+        box = blocks['spec-1']['data'][0]['values']
+        self.assertEqual(box, {'encoding': 'shared', 'rows': None,
+                               'columns': ['sample-id', 'A', 'group'],
+                               'constants': {}})
+
+        # lineplot's line is sorted by group, then `x_measure`
+        line = blocks['spec-2']['data'][1]['values']
+        self.assertEqual(line['rows'], [3, 1, 2, 0])
+
+        # the ungrouped lineplot's `legend` is added in the browser, but its
+        # averaged data isn't in the metadata, so it's embedded as usual
+        scatter, averaged = [data['values']
+                             for data in blocks['spec-3']['data']]
+        self.assertEqual(scatter['constants'], {'legend': 'data'})
+        self.assertIsInstance(averaged, list)
+
+        self.assertIn('<h1>Samples</h1>', html)
+        self.assertIn('<h2 id="averaged">averaged</h2>', html)
+
+    def test_marker_like_title(self):
+        html, blocks = self.render(self.plots[:1], title='{{BLOCK:data}}')
+
+        self.assertIn('<h1>{{BLOCK:data}}</h1>', html)
+        self.assertEqual(set(blocks), {'data', 'spec-0'})
+
+    def test_dashboard_data_encoding(self):
+        _, blocks = self.render(self.plots[:1], data_encoding='columns')
+
+        self.assertEqual(blocks['data']['encoding'], 'columns')
+        self.assertEqual(blocks['data']['data']['A'], [1.0, 2.0, 3.0, 4.0])
+
+    def test_plot_renderer(self):
+        self.plots[0]['renderer'] = 'canvas'
+        html, _ = self.render(self.plots[:2])
+
+        self.assertEqual(re.findall(r'data-renderer="(.*?)"', html),
+                         ['canvas', 'svg'])
+
+    def test_json_plots(self):
+        html, blocks = self.render([json.dumps(plot)
+                                    for plot in self.plots[:2]])
+
+        self.assertEqual(set(blocks), {'data', 'spec-0', 'spec-1'})
+
+        with self.assertRaisesRegex(ValueError, 'Plot 1 is not valid JSON'):
+            self.render([json.dumps(self.plots[0]), '{"visualizer": '])
+        with self.assertRaisesRegex(ValueError, 'Plot 0 must be a JSON'
+                                                ' object'):
+            self.render(['["boxplot"]'])
+
+    def test_plot_data_encoding_error(self):
+        self.plots[1]['data_encoding'] = 'columns'
+
+        with self.assertRaisesRegex(ValueError, '`001-boxplot` sets'
+                                                ' `data_encoding`'):
+            self.render(self.plots)
+
+    def test_chunked_data_encoding_error(self):
+        with self.assertRaisesRegex(ValueError, '`chunked` data encoding is'
+                                                ' not supported'):
+            self.render(self.plots, data_encoding='chunked')
+
+    # utility method that will run all checks for the dashboard
+    # used in each browser test below (firefox & chrome supported)
+    def _selenium_dashboard_test(self, driver):
+        with tempfile.TemporaryDirectory() as output_dir:
+            dashboard(output_dir, self.md, self.plots, title='Samples')
+
+            driver.get(f"file://{os.path.join(output_dir, 'index.html')}")
+
+            views = driver.find_elements(By.CSS_SELECTOR, 'div.view')
+            self.assertEqual(len(views), len(self.plots))
+
+            # views are only drawn once they're scrolled to, so the last one
+            # (far below the fold) isn't drawn yet
+            self.assertEqual(
+                views[-1].find_elements(By.CSS_SELECTOR, 'svg.marks'), [])
+
+            # each view's marks, drawn from the shared data: a point per
+            # sample, a box per group, and a line per group (or one line
+            # through the averages)
+            exp_marks = [
+                {'g.mark-symbol.role-mark > path': 4},
+                {'path[aria-label="boxGroup"]': 2,
+                 'path[aria-label="medianLine"]': 2},
+                {'g.mark-symbol.role-mark > path': 4,
+                 'g.mark-line.role-mark': 2},
+                {'g.mark-symbol.role-mark > path': 4,
+                 'g.mark-line.role-mark': 1}
+            ]
+
+            for view, exp in zip(views, exp_marks):
+                driver.execute_script('arguments[0].scrollIntoView();', view)
+                WebDriverWait(driver, 10).until(
+                    lambda driver: view.find_elements(By.CSS_SELECTOR,
+                                                      'svg.marks'))
+
+                for selector, exp_marks_len in exp.items():
+                    with self.subTest(view=view.get_attribute('data-spec'),
+                                      selector=selector):
+                        mark_elements = view.find_elements(By.CSS_SELECTOR,
+                                                           selector)
+                        self.assertEqual(len(mark_elements), exp_marks_len)
+
+    # run selenium checks with a chrome driver
+    def test_dashboard_chrome(self):
+        chrome_options = ChromeOptions()
+        chrome_options.add_argument('-headless')
+
+        with webdriver.Chrome(options=chrome_options) as driver:
+            self._selenium_dashboard_test(driver)
+
+    # run selenium checks with a firefox driver
+    def test_dashboard_firefox(self):
+        firefox_options = FirefoxOptions()
+        firefox_options.add_argument('-headless')
+
+        with webdriver.Firefox(options=firefox_options) as driver:
+            self._selenium_dashboard_test(driver)
+
+    def test_shared_reference(self):
+        base = self.md.to_dataframe().reset_index()
+
+        obs = _shared_reference(base, base[['A', 'group']].iloc[[2, 0]])
+        self.assertEqual(obs, {'encoding': 'shared', 'rows': [2, 0],
+                               'columns': ['A', 'group'], 'constants': {}})
+
+        obs = _shared_reference(base, base[['A']].assign(legend='data'))
+        self.assertEqual(obs['constants'], {'legend': 'data'})
+
+        # constants are JSON values, whatever the type of their column
+        obs = _shared_reference(base, base[['A']].assign(
+            n=np.int64(3), missing=np.nan))
+        self.assertEqual(obs['constants'], {'n': 3, 'missing': None})
+        self.assertEqual(json.dumps(obs['constants']),
+                         '{"n": 3, "missing": null}')
+
+        modified = base[['A']].copy()
+        modified.loc[0, 'A'] = 10.0
+        self.assertIsNone(_shared_reference(base, modified))
+
+        added = base.assign(C=range(len(base)))
+        self.assertIsNone(_shared_reference(base, added))
+
+        aggregated = base.groupby('group', as_index=False)['A'].mean()
+        self.assertIsNone(_shared_reference(base, aggregated))
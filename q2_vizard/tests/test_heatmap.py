@@ -6,7 +6,9 @@
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
 
+import io
 import os
+import json
 import tempfile
 import pandas as pd
 
@@ -18,7 +20,9 @@ from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from qiime2 import Metadata
 from qiime2.plugin.testing import TestPluginBase
 
-from q2_vizard.heatmap import heatmap
+from q2_vizard.heatmap import (heatmap, _aggregate_cells, _band_domain,
+                               _heatmap_spec)
+from q2_vizard._render import _write_spec
 
 
 class TestHeatmap(TestPluginBase):
@@ -50,16 +54,125 @@ class TestHeatmap(TestPluginBase):
              'sample1')
         ]
 
+    def test_aggregate_cells(self):
+        md = self.md.to_dataframe().reset_index()
+        # two samples share the (right-foot, foo) cell
+        md.loc[3, 'foobar'] = 'foo'
+
+        exp_gradients = {'mean': 55.0, 'median': 55.0, 'sum': 110.0,
+                         'count': 2}
+        for aggregate_method, exp_gradient in exp_gradients.items():
+            with self.subTest(aggregate_method=aggregate_method):
+                cells = _aggregate_cells(md, 'bodysite', 'foobar', 'Z',
+                                         aggregate_method)
+
+                self.assertEqual(list(cells.columns),
+                                 ['bodysite', 'foobar', 'Z'])
+                self.assertEqual(len(cells), 5)
+
+                cell = cells[(cells['bodysite'] == 'right-foot') &
+                             (cells['foobar'] == 'foo')]
+                self.assertEqual(list(cell['Z']), [exp_gradient])
+
+    def test_aggregate_cells_same_x_y_measure(self):
+        md = self.md.to_dataframe().reset_index()
+
+        cells = _aggregate_cells(md, 'bodysite', 'bodysite', 'Z', 'sum')
+
+        self.assertEqual(list(cells.columns), ['bodysite', 'Z'])
+        self.assertEqual(dict(zip(cells['bodysite'], cells['Z'])),
+                         {'left-palm': 110, 'right-foot': 110, 'gut': 77})
+
+    def test_aggregate_gradient_measure_as_cell_error(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            with self.assertRaisesRegex(
+                ValueError, 'same column `Z` has been used'
+            ):
+                heatmap(output_dir=output_dir, metadata=self.md,
+                        x_measure='bodysite', y_measure='Z',
+                        gradient_measure='Z', aggregate_method='mean')
+
+    def test_chunked_data_encoding_error(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            with self.assertRaisesRegex(
+                ValueError, '`chunked` data encoding is only supported'
+            ):
+                heatmap(output_dir=output_dir, metadata=self.md,
+                        x_measure='bodysite', y_measure='foobar',
+                        gradient_measure='Z', data_encoding='chunked')
+
+    def test_band_domain(self):
+        values = pd.Series(['b', None, 'a', 'b'])
+
+        # missing values sort lowest, as they do in vega
+        self.assertEqual(_band_domain(values, 'ascending'), [None, 'a', 'b'])
+        self.assertEqual(_band_domain(values, 'descending'),
+                         ['b', 'a', None])
+
+        numbers = pd.Series([10.0, 2.0, 10.0])
+        self.assertEqual(_band_domain(numbers, 'ascending'), [2.0, 10.0])
+
+    def test_precompute_domains(self):
+        _, template, values, _ = _heatmap_spec(
+            self.md, x_measure='bodysite', y_measure='foobar',
+            gradient_measure='Z', precompute_domains=True)
+
+        fh = io.StringIO()
+        _write_spec(fh, template, **values)
+        spec = json.loads(fh.getvalue())
+
+        self.assertEqual([data['name'] for data in spec['data']], ['table'])
+
+        domains = {scale['name']: scale['domain']
+                   for scale in spec['scales']}
+        self.assertEqual(domains, {
+            'x_scale': ['gut', 'left-palm', 'right-foot'],
+            'y_scale': ['foo', 'baz', 'bar'],
+            'color': [22, 77]
+        })
+
+        signals = {signal['name']: signal for signal in spec['signals']}
+        self.assertEqual(signals['nColumns'], {'name': 'nColumns',
+                                               'value': 3})
+        self.assertEqual(signals['nRows'], {'name': 'nRows', 'value': 3})
+
+    def test_precompute_domains_precision(self):
+        md = Metadata(pd.DataFrame(
+            {'x': [0.30000000000000004, 0.1, 1e-11, 2.0],
+             'y': ['a', 'b', 'a', 'b'],
+             'z': [1.0, 2.0, 3.0, 4.0]},
+            index=pd.Index(['s1', 's2', 's3', 's4'], name='id')))
+
+        for data_encoding in ('records', 'columns'):
+            _, template, values, _ = _heatmap_spec(
+                md, x_measure='x', y_measure='y', gradient_measure='z',
+                precompute_domains=True)
+
+            fh = io.StringIO()
+            _write_spec(fh, template, data_encoding=data_encoding, **values)
+            spec = json.loads(fh.getvalue())
+
+            # every cell's value is in the domain it's drawn from
+            x_domain = spec['scales'][0]['domain']
+            data = spec['data'][0]['values']
+            x_values = data['data']['x'] if data_encoding == 'columns' \
+                else [record['x'] for record in data]
+
+            self.assertEqual(x_domain, [0.0, 0.1, 0.3, 2.0])
+            self.assertTrue(set(x_values) <= set(x_domain))
+
     # utility method that will run all checks for heatmap
     # used in each browser test below (firefox & chrome supported)
     def _selenium_heatmap_test(self, driver, x_measure, y_measure,
                                gradient_measure, exp_marks_len, exp_x_mark,
-                               exp_y_mark, exp_gradient_mark, exp_mark_id):
+                               exp_y_mark, exp_gradient_mark, exp_mark_id,
+                               precompute_domains=False):
         with tempfile.TemporaryDirectory() as output_dir:
             heatmap(
                 output_dir=output_dir, metadata=self.md,
                 x_measure=x_measure, y_measure=y_measure,
-                gradient_measure=gradient_measure
+                gradient_measure=gradient_measure,
+                precompute_domains=precompute_domains
             )
 
             driver.get(f"file://{os.path.join(output_dir, 'index.html')}")
@@ -119,18 +232,22 @@ class TestHeatmap(TestPluginBase):
                  exp_y_mark, exp_gradient_mark,
                  exp_mark_id) in self.test_cases:
 
-                with self.subTest(
-                    x_measure=x_measure, y_measure=y_measure,
-                    gradient_measure=gradient_measure,
-                    exp_marks_len=exp_marks_len, exp_x_mark=exp_x_mark,
-                    exp_y_mark=exp_y_mark, exp_gradient_mark=exp_gradient_mark,
-                    exp_mark_id=exp_mark_id
-                ):
+                for precompute_domains in [False, True]:
+                    with self.subTest(
+                        x_measure=x_measure, y_measure=y_measure,
+                        gradient_measure=gradient_measure,
+                        exp_marks_len=exp_marks_len, exp_x_mark=exp_x_mark,
+                        exp_y_mark=exp_y_mark,
+                        exp_gradient_mark=exp_gradient_mark,
+                        exp_mark_id=exp_mark_id,
+                        precompute_domains=precompute_domains
+                    ):
 
-                    self._selenium_heatmap_test(
-                        driver, x_measure, y_measure,
-                        gradient_measure, exp_marks_len, exp_x_mark,
-                        exp_y_mark, exp_gradient_mark, exp_mark_id)
+                        self._selenium_heatmap_test(
+                            driver, x_measure, y_measure,
+                            gradient_measure, exp_marks_len, exp_x_mark,
+                            exp_y_mark, exp_gradient_mark, exp_mark_id,
+                            precompute_domains)
 
     # run selenium checks with a firefox driver
     def test_heatmap_firefox(self):
@@ -146,15 +263,19 @@ class TestHeatmap(TestPluginBase):
                  exp_y_mark, exp_gradient_mark,
                  exp_mark_id) in self.test_cases:
 
-                with self.subTest(
-                    x_measure=x_measure, y_measure=y_measure,
-                    gradient_measure=gradient_measure,
-                    exp_marks_len=exp_marks_len, exp_x_mark=exp_x_mark,
-                    exp_y_mark=exp_y_mark, exp_gradient_mark=exp_gradient_mark,
-                    exp_mark_id=exp_mark_id
-                ):
-
-                    self._selenium_heatmap_test(
-                        driver, x_measure, y_measure,
-                        gradient_measure, exp_marks_len, exp_x_mark,
-                        exp_y_mark, exp_gradient_mark, exp_mark_id)
+                for precompute_domains in [False, True]:
+                    with self.subTest(
+                        x_measure=x_measure, y_measure=y_measure,
+                        gradient_measure=gradient_measure,
+                        exp_marks_len=exp_marks_len, exp_x_mark=exp_x_mark,
+                        exp_y_mark=exp_y_mark,
+                        exp_gradient_mark=exp_gradient_mark,
+                        exp_mark_id=exp_mark_id,
+                        precompute_domains=precompute_domains
+                    ):
+
+                        self._selenium_heatmap_test(
+                            driver, x_measure, y_measure,
+                            gradient_measure, exp_marks_len, exp_x_mark,
+                            exp_y_mark, exp_gradient_mark, exp_mark_id,
+                            precompute_domains)
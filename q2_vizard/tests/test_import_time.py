@@ -0,0 +1,71 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import sys
+import subprocess
+
+from qiime2.plugin.testing import TestPluginBase
+
+
+# total self time (in microseconds) that loading the plugin may add on top
+# of the qiime2 framework that it's built on
+IMPORT_BUDGET_US = 250000
+
+# modules that are too slow to import while QIIME 2 is loading plugins
+DEFERRED_IMPORTS = ['pkg_resources', 'jinja2']
+
+
+def _import_times(statement):
+    """
+    Run `statement` under `python -X importtime` and return a mapping of
+    each imported module to its self import time in microseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        capture_output=True, text=True, check=True
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+
+        self_us, _, module = line[len('import time:'):].split('|')
+        # skip the header line
+        if not self_us.strip().isdigit():
+            continue
+
+        times[module.strip()] = int(self_us)
+
+    return times
+
+
+class TestImportTime(TestPluginBase):
+    package = 'q2_vizard.tests'
+
+    def test_plugin_setup_import_time(self):
+        framework = _import_times('import qiime2.plugin')
+        plugin = _import_times('import qiime2.plugin;'
+                               ' import q2_vizard.plugin_setup')
+
+        # only count the modules that importing the plugin brought in
+        plugin_only = {module: us for module, us in plugin.items()
+                       if module not in framework}
+        self.assertIn('q2_vizard.plugin_setup', plugin_only)
+
+        top_level = {module.split('.')[0] for module in plugin_only}
+        for module in DEFERRED_IMPORTS:
+            self.assertNotIn(module, top_level)
+
+        total_us = sum(plugin_only.values())
+        slowest = sorted(plugin_only, key=plugin_only.get, reverse=True)[:5]
+        self.assertLess(
+            total_us, IMPORT_BUDGET_US,
+            f'Importing q2_vizard.plugin_setup took {total_us}us, the slowest'
+            f' modules being: {slowest}'
+        )
@@ -0,0 +1,201 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import io
+import json
+import tempfile
+import tracemalloc
+from unittest import mock
+
+from qiime2 import Metadata
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_vizard import scatterplot_2d, lineplot, boxplot
+from q2_vizard._instrument import (_Recorder, _phase, _collapsed_stacks,
+                                   _NULL_PHASE, _INSTRUMENT_ENV_VAR,
+                                   _PHASES_FILENAME, _PROFILE_ENV_VAR)
+
+
+_REPORTS = []
+
+
+def _collect(report):
+    _REPORTS.append(report)
+
+
+class TestInstrument(TestPluginBase):
+    package = 'q2_vizard.tests'
+
+    def setUp(self):
+        super().setUp()
+
+        self.md = Metadata.load(self.get_data_path('sample-md.tsv'))
+        _REPORTS.clear()
+
+    def render(self, visualizer, sinks, **params):
+        with tempfile.TemporaryDirectory() as output_dir, \
+                mock.patch.dict(os.environ, {_INSTRUMENT_ENV_VAR: sinks}):
+            visualizer(output_dir=output_dir, metadata=self.md, **params)
+            return sorted(os.listdir(output_dir)), output_dir
+
+    def test_disabled(self):
+        obs, _ = self.render(scatterplot_2d, '',
+                             x_measure='x', y_measure='y')
+
+        self.assertNotIn(_PHASES_FILENAME, obs)
+        self.assertIs(_phase('spec'), _NULL_PHASE)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_file_sink(self):
+        with tempfile.TemporaryDirectory() as output_dir, \
+                mock.patch.dict(os.environ, {_INSTRUMENT_ENV_VAR: 'file'}):
+            scatterplot_2d(output_dir=output_dir, metadata=self.md,
+                           x_measure='x', y_measure='y')
+
+            with open(os.path.join(output_dir, _PHASES_FILENAME)) as fh:
+                report = json.load(fh)
+            html_size = os.path.getsize(
+                os.path.join(output_dir, 'index.html'))
+
+        self.assertEqual(report['visualizer'], 'scatterplot_2d')
+        self.assertEqual(report['files']['index.html'], html_size)
+        for name in ('render', 'spec', 'to_dataframe', 'validate',
+                     'load_assets', 'render_template', 'write_spec',
+                     'fill_spec', 'write_data'):
+            self.assertEqual(report['phases'][name]['calls'], 1)
+
+        phases = report['phases']
+        self.assertLessEqual(phases['spec']['seconds'],
+                             phases['render']['seconds'])
+        self.assertLessEqual(phases['to_dataframe']['peak_bytes'],
+                             phases['spec']['peak_bytes'])
+        self.assertLess(phases['write_data']['payload_bytes'],
+                        phases['write_spec']['payload_bytes'])
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_callback_sink(self):
+        self.render(boxplot, f'{__name__}:_collect',
+                    distribution_measure='x', group_by='group',
+                    data_encoding='sidecar')
+
+        report, = _REPORTS
+        self.assertEqual(report['visualizer'], 'boxplot')
+        self.assertIn('write_sidecars', report['phases'])
+        self.assertIn('data/metadata.json', report['files'])
+
+    def test_log_sink(self):
+        with self.assertLogs('q2_vizard', level='INFO') as logs:
+            self.render(scatterplot_2d, 'log',
+                        x_measure='x', y_measure='y')
+
+        self.assertTrue(any('scatterplot_2d write_spec' in line
+                            and 'bytes written' in line
+                            for line in logs.output))
+
+    def test_invalid_sink(self):
+        with self.assertRaisesRegex(ValueError, 'not `loud`'):
+            self.render(scatterplot_2d, 'file,loud',
+                        x_measure='x', y_measure='y')
+
+    def test_nested_peaks(self):
+        recorder = _Recorder('test')
+
+        tracemalloc.start()
+        try:
+            with recorder.phase('outer'):
+                with recorder.phase('inner'):
+                    block = bytearray(2 ** 20)
+                    del block
+                block = bytearray(2 ** 16)
+                del block
+            with recorder.phase('written', io.StringIO()) as record:
+                pass
+        finally:
+            tracemalloc.stop()
+
+        phases = recorder.phases
+        # the inner phase's peak is part of the outer phase's
+        self.assertGreaterEqual(phases['inner'].peak_bytes, 2 ** 20)
+        self.assertGreaterEqual(phases['outer'].peak_bytes,
+                                phases['inner'].peak_bytes)
+        self.assertLess(phases['outer'].peak_bytes, 2 ** 20 + 2 ** 16)
+        self.assertEqual(record.payload_bytes, 0)
+        self.assertIsNone(phases['outer'].payload_bytes)
+
+
+class TestProfile(TestPluginBase):
+    package = 'q2_vizard.tests'
+
+    def setUp(self):
+        super().setUp()
+
+        self.md = Metadata.load(self.get_data_path('sample-md.tsv'))
+
+    def test_profile_dir(self):
+        with tempfile.TemporaryDirectory() as output_dir, \
+                tempfile.TemporaryDirectory() as profile_dir, \
+                mock.patch.dict(os.environ, {_PROFILE_ENV_VAR: profile_dir}):
+            for replicate_method in ('mean', 'mean', 'median'):
+                lineplot(output_dir=output_dir, metadata=self.md,
+                         x_measure='x', y_measure='y',
+                         replicate_method=replicate_method)
+
+            obs = sorted(os.listdir(profile_dir))
+            self.assertNotIn('.prof', ' '.join(os.listdir(output_dir)))
+
+            with open(os.path.join(profile_dir, obs[0])) as fh:
+                collapsed = fh.read()
+
+        # one profile for each distinct set of parameters
+        self.assertEqual(len(obs), 4)
+        self.assertTrue(all(name.startswith('lineplot-') for name in obs))
+        self.assertEqual({os.path.splitext(name)[1] for name in obs},
+                         {'.prof', '.collapsed'})
+        self.assertIn('_lineplot_spec (lineplot.py:', collapsed)
+
+    def test_profile_output_dir(self):
+        with tempfile.TemporaryDirectory() as output_dir, \
+                mock.patch.dict(os.environ, {_PROFILE_ENV_VAR: '1'}):
+            scatterplot_2d(output_dir=output_dir, metadata=self.md,
+                           x_measure='x', y_measure='y')
+
+            obs = [os.path.splitext(name)[1]
+                   for name in os.listdir(output_dir)
+                   if name.startswith('scatterplot_2d-')]
+
+        self.assertEqual(sorted(obs), ['.collapsed', '.prof'])
+
+    def test_collapsed_stacks(self):
+        main = ('main.py', 1, 'main')
+        a = ('a.py', 1, 'a')
+        b = ('/lib/b.py', 2, 'b')
+        builtin = ('~', 0, '<built-in method len>')
+
+        # b is called by both main & a, and a is recursive, which isn't
+        # followed since its time is already part of the outer call
+        stats = {
+            main: (1, 1, 1.0, 10.0, {}),
+            a: (2, 1, 2.0, 6.0, {main: (1, 1, 1.0, 6.0),
+                                 a: (1, 1, 1.0, 3.0)}),
+            b: (2, 2, 4.0, 6.0, {main: (1, 1, 1.0, 3.0),
+                                 a: (1, 1, 1.0, 3.0)}),
+            builtin: (1, 1, 2.0, 2.0, {b: (1, 1, 2.0, 2.0)}),
+        }
+
+        obs = _collapsed_stacks(stats)
+
+        self.assertEqual(obs, [
+            'main (main.py:1) 1000000',
+            'main (main.py:1);a (a.py:1) 2000000',
+            'main (main.py:1);a (a.py:1);b (b.py:2) 2000000',
+            'main (main.py:1);a (a.py:1);b (b.py:2);'
+            '<built-in method len> 1000000',
+            'main (main.py:1);b (b.py:2) 2000000',
+            'main (main.py:1);b (b.py:2);<built-in method len> 1000000',
+        ])
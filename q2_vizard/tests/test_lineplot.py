@@ -8,11 +8,15 @@
 
 import os
 import tempfile
+from unittest import mock
+
+import pandas as pd
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
+from selenium.webdriver.support.ui import WebDriverWait
 
 from qiime2.plugin.testing import TestPluginBase
 from qiime2 import Metadata
@@ -66,6 +70,23 @@ class TestLineplot(TestPluginBase):
                 lineplot(output_dir=output_dir, metadata=self.md,
                          x_measure='x', y_measure='y')
 
+    def test_x_replicates_reported_for_first_group_with_replicates(self):
+        index = pd.Index(['s1', 's2', 's3', 's4', 's5', 's6'],
+                         name='sample-id')
+        md = Metadata(pd.DataFrame({
+            'group': ['bb', 'aa', 'bb', 'cc', 'aa', 'cc'],
+            'x': [1.0, 1.0, 2.0, 3.0, 1.0, 3.0],
+            'y': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+        }, index=index))
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with self.assertRaisesRegex(
+                ValueError,
+                'Replicates found in `x` within the `aa` `group_by` group'
+            ):
+                lineplot(output_dir=output_dir, metadata=md,
+                         x_measure='x', y_measure='y', group_by='group')
+
     # selenium testing
     def _selenium_lineplot_test(self, driver, x_measure, y_measure,
                                 group_measure, replicate_method, exp_subtitle,
@@ -192,3 +213,44 @@ class TestLineplot(TestPluginBase):
                         driver, x_measure, y_measure, group_measure,
                         replicate_method, exp_subtitle, exp_legend,
                         exp_marks_len, exp_mark_id, exp_x_mark, exp_y_mark)
+
+    # the points & averaged lines are inserted a few records at a time
+    def _selenium_chunked_test(self, driver):
+        with tempfile.TemporaryDirectory() as output_dir, \
+                mock.patch('q2_vizard._render._PROGRESSIVE_CHUNKSIZE', 3):
+            lineplot(output_dir=output_dir, metadata=self.md,
+                     x_measure='x', y_measure='y', group_by='group',
+                     replicate_method='median', data_encoding='chunked')
+
+            driver.get(f"file://{os.path.join(output_dir, 'index.html')}")
+
+            # each chunk block is removed once it's been inserted, and the
+            # progress indicator once they all have been
+            WebDriverWait(driver, 10).until(
+                lambda driver: not driver.find_elements(
+                    By.CSS_SELECTOR, 'script[id^="chunk-"], #progress'))
+
+            mark_elements = \
+                driver.find_elements(By.CSS_SELECTOR,
+                                     'g.mark-symbol.role-mark > path')
+            self.assertEqual(len(mark_elements), self.md.id_count)
+
+            line_elements = \
+                driver.find_elements(By.CSS_SELECTOR, 'g.mark-line.role-mark')
+            self.assertEqual(
+                len(line_elements),
+                self.md.to_dataframe()['group'].nunique())
+
+    def test_lineplot_chunked_chrome(self):
+        chrome_options = ChromeOptions()
+        chrome_options.add_argument('-headless')
+
+        with webdriver.Chrome(options=chrome_options) as driver:
+            self._selenium_chunked_test(driver)
+
+    def test_lineplot_chunked_firefox(self):
+        firefox_options = FirefoxOptions()
+        firefox_options.add_argument('-headless')
+
+        with webdriver.Firefox(options=firefox_options) as driver:
+            self._selenium_chunked_test(driver)
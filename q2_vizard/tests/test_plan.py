@@ -0,0 +1,181 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import io
+import os
+import re
+import json
+import tempfile
+from unittest import mock
+
+import pandas as pd
+
+from qiime2 import Metadata
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_vizard import scatterplot_2d, lineplot, heatmap, boxplot
+from q2_vizard._plan import (_estimate_payload, _downsample,
+                             _MAX_MARKS_ENV_VAR, _MAX_EMBEDDED_BYTES_ENV_VAR)
+from q2_vizard._render import _write_records
+from q2_vizard._synthetic import _synthetic_dataframe
+
+
+class TestRenderPlan(TestPluginBase):
+    package = 'q2_vizard.tests'
+
+    def setUp(self):
+        super().setUp()
+
+        self.md = Metadata.load(self.get_data_path('sample-md.tsv'))
+
+    def render(self, visualizer, budgets, **params):
+        with tempfile.TemporaryDirectory() as output_dir, \
+                mock.patch.dict(os.environ, budgets):
+            visualizer(output_dir=output_dir, metadata=self.md, **params)
+
+            with open(os.path.join(output_dir, 'index.html')) as fh:
+                html = fh.read()
+            with open(os.path.join(output_dir, 'render-plan.json')) as fh:
+                plan = json.load(fh)
+
+        match = re.search(r'<script type="application/json" id="spec">'
+                          r'(.*?)</script>', html, re.S)
+        return json.loads(match.group(1)), plan
+
+    def test_raw(self):
+        spec, plan = self.render(scatterplot_2d, {})
+
+        self.assertEqual(plan['mode'], 'raw')
+        self.assertEqual(plan['marks'], self.md.id_count)
+        self.assertEqual(plan['data_encoding'], 'records')
+        self.assertEqual(len(spec['data'][0]['values']), self.md.id_count)
+        self.assertEqual(spec['title']['subtitle'], ' ')
+
+    def test_downsample(self):
+        spec, plan = self.render(scatterplot_2d, {_MAX_MARKS_ENV_VAR: '10'})
+
+        self.assertEqual(plan['mode'], 'downsample')
+        self.assertLess(len(spec['data'][0]['values']), self.md.id_count)
+        self.assertIn('A random 52.6% of the data is shown',
+                      spec['title']['subtitle'])
+
+        # the same samples are drawn every time
+        obs, _ = self.render(scatterplot_2d, {_MAX_MARKS_ENV_VAR: '10'})
+        self.assertEqual(obs['data'][0]['values'],
+                         spec['data'][0]['values'])
+
+    def test_aggregate(self):
+        # five marks for each of the three boxes, and three outliers
+        spec, plan = self.render(boxplot, {_MAX_MARKS_ENV_VAR: '18'},
+                                 distribution_measure='x', group_by='group')
+
+        self.assertEqual(plan['mode'], 'aggregate')
+        self.assertEqual(plan['steps'][0]['params'],
+                         {'precompute_summary': True})
+        self.assertEqual([data['name'] for data in spec['data'][:2]],
+                         ['summary', 'outliers'])
+
+        signals = {signal['name']: signal for signal in spec['signals']}
+        self.assertIn('The data was aggregated',
+                      signals['subtitle']['value'])
+
+    def test_aggregate_then_downsample(self):
+        _, plan = self.render(heatmap, {_MAX_MARKS_ENV_VAR: '2'},
+                              x_measure='group', y_measure='a',
+                              gradient_measure='y')
+
+        self.assertEqual(plan['mode'], 'aggregate+downsample')
+        self.assertEqual(plan['steps'][0]['params'],
+                         {'aggregate_method': 'mean'})
+
+    def test_sidecar(self):
+        spec, plan = self.render(scatterplot_2d,
+                                 {_MAX_EMBEDDED_BYTES_ENV_VAR: '100'})
+
+        self.assertEqual(plan['mode'], 'sidecar')
+        self.assertEqual(plan['data_encoding'], 'sidecar')
+        self.assertEqual(spec['data'][0]['url'], 'data/metadata.json')
+
+        # an encoding that was chosen isn't replaced
+        _, plan = self.render(scatterplot_2d,
+                              {_MAX_EMBEDDED_BYTES_ENV_VAR: '100'},
+                              data_encoding='columns')
+        self.assertEqual(plan['mode'], 'raw')
+
+    def test_no_limit(self):
+        _, plan = self.render(scatterplot_2d, {_MAX_MARKS_ENV_VAR: '0'})
+
+        self.assertEqual(plan['mode'], 'raw')
+        self.assertIsNone(plan['max_marks'])
+
+    def test_invalid_budget(self):
+        with self.assertRaisesRegex(ValueError, '`Q2_VIZARD_MAX_MARKS` must'):
+            self.render(scatterplot_2d, {_MAX_MARKS_ENV_VAR: 'lots'})
+
+    def test_downsample_keeps_order(self):
+        df = pd.DataFrame({'id': [f'sample{i:04d}' for i in range(1000)],
+                           'a': range(1000)})
+        obs, = _downsample([df], 0.1, 'id')
+
+        self.assertLess(abs(len(obs) - 100), 30)
+        self.assertTrue(obs['a'].is_monotonic_increasing)
+
+        # aggregates are thinned by row when there are no IDs to sample
+        obs, = _downsample([df[['a']]], 0.1, 'id')
+        self.assertLess(abs(len(obs) - 100), 30)
+
+    def test_downsample_shared_samples(self):
+        df = _synthetic_dataframe(1000, replicates=1)
+        params = dict(x_measure='timepoint', y_measure='numeric0',
+                      group_by='categorical0')
+
+        sampled_ids = []
+        for order in (df, df.sample(frac=1, random_state=1)):
+            self.md = Metadata(order)
+            spec, plan = self.render(lineplot, {_MAX_MARKS_ENV_VAR: '200'},
+                                     **params)
+            self.assertEqual(plan['mode'], 'downsample')
+
+            datasets = {data['name']: data['values']
+                        for data in spec['data']}
+            point_ids = {row['id'] for row in datasets['scatter_table']}
+            line_ids = {row['id'] for row in datasets['line_table']}
+
+            # the line is drawn through the very points that are shown
+            self.assertGreater(len(point_ids), 0)
+            self.assertEqual(point_ids, line_ids)
+            sampled_ids.append(point_ids)
+
+        # and the same samples are drawn whatever the order of the metadata
+        self.assertEqual(sampled_ids[0], sampled_ids[1])
+
+    def test_downsample_keeps_averages(self):
+        self.md = Metadata(_synthetic_dataframe(1000, replicates=3))
+        spec, plan = self.render(lineplot, {_MAX_MARKS_ENV_VAR: '200'},
+                                 x_measure='timepoint', y_measure='numeric0',
+                                 group_by='categorical0',
+                                 replicate_method='mean')
+
+        self.assertEqual(plan['mode'], 'downsample')
+        datasets = {data['name']: data['values'] for data in spec['data']}
+        self.assertLess(len(datasets['scatter_table']), 1000)
+        # the averaged lines are of every sample, so they're kept whole
+        self.assertEqual(
+            len(datasets['line_table']),
+            len(self.md.to_dataframe().groupby(['timepoint',
+                                                'categorical0'])))
+
+    def test_estimate_payload(self):
+        df = self.md.to_dataframe().reset_index()
+
+        fh = io.StringIO()
+        _write_records(fh, df)
+        obs = _estimate_payload({'metadata': df, 'md_ids': 'sample_name'})
+
+        self.assertLess(abs(obs - len(fh.getvalue())) / len(fh.getvalue()),
+                        0.25)
@@ -0,0 +1,328 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import io
+import os
+import re
+import gzip
+import json
+import base64
+import tempfile
+import unittest
+import importlib.util
+from unittest import mock
+
+import pandas as pd
+
+from qiime2.plugin.testing import TestPluginBase
+
+from .._util import _SpecTemplate, _json_replace
+from .._render import (_write_records, _write_columns, _write_gzip,
+                       _write_arrow, _write_spec, _write_sidecars,
+                       _write_chunks, _chunked_frames, _choose_renderer,
+                       _load_assets, _CANVAS_MARK_THRESHOLD,
+                       _clear_asset_cache, _SPEC_CACHE,
+                       _RELOAD_ASSETS_ENV_VAR)
+
+
+class TestBase(TestPluginBase):
+    package = 'q2_vizard.tests'
+
+    def setUp(self):
+        super().setUp()
+        self.df = pd.DataFrame({
+            'sample-id': ['sample1', 'sample2', 'sample3'],
+            'numeric-col': [1.0, None, 3.5],
+            'categorical-col': ['foo', 'b/ar', None]
+        })
+        self.json_obj = {
+            'data': [{'name': 'table',
+                      'values': {'{{REPLACE_PARAM}}': 'metadata'}}],
+            'signals': [{'name': 'idField',
+                         'value': {'{{REPLACE_PARAM}}': 'md_ids'}}]
+        }
+
+
+class TestWriteRecords(TestBase):
+    def test_write_records(self):
+        fh = io.StringIO()
+        _write_records(fh, self.df)
+
+        self.assertEqual(json.loads(fh.getvalue()),
+                         json.loads(self.df.to_json(orient='records')))
+
+    def test_write_records_chunked(self):
+        for chunksize in [1, 2, 3, 4]:
+            with self.subTest(chunksize=chunksize):
+                fh = io.StringIO()
+                _write_records(fh, self.df, chunksize=chunksize)
+
+                self.assertEqual(
+                    json.loads(fh.getvalue()),
+                    json.loads(self.df.to_json(orient='records')))
+
+    def test_write_records_empty(self):
+        fh = io.StringIO()
+        _write_records(fh, self.df.iloc[:0])
+
+        self.assertEqual(fh.getvalue(), '[]')
+
+
+class TestWriteColumns(TestBase):
+    def test_write_columns(self):
+        fh = io.StringIO()
+        _write_columns(fh, self.df)
+        obs = json.loads(fh.getvalue())
+
+        self.assertEqual(obs['encoding'], 'columns')
+        self.assertEqual(list(obs['data']), list(self.df.columns))
+        self.assertEqual(obs['data']['numeric-col'], [1.0, None, 3.5])
+        self.assertEqual(obs['data']['categorical-col'], ['foo', 'b/ar', None])
+
+    def test_write_columns_empty(self):
+        fh = io.StringIO()
+        _write_columns(fh, self.df.iloc[:0])
+        obs = json.loads(fh.getvalue())
+
+        self.assertEqual(obs['data'], {'sample-id': [], 'numeric-col': [],
+                                       'categorical-col': []})
+
+
+class TestWriteGzip(TestBase):
+    def test_write_gzip(self):
+        fh = io.StringIO()
+        _write_gzip(fh, self.df)
+        obs = json.loads(fh.getvalue())
+
+        self.assertEqual(obs['encoding'], 'gzip')
+        records = gzip.decompress(base64.b64decode(obs['data']))
+        self.assertEqual(json.loads(records),
+                         json.loads(self.df.to_json(orient='records')))
+
+    def test_write_gzip_reproducible(self):
+        fh1, fh2 = io.StringIO(), io.StringIO()
+        _write_gzip(fh1, self.df)
+        _write_gzip(fh2, self.df)
+
+        self.assertEqual(fh1.getvalue(), fh2.getvalue())
+
+
+@unittest.skipUnless(importlib.util.find_spec('pyarrow'),
+                     'pyarrow is not installed')
+class TestWriteArrow(TestBase):
+    def _read_arrow(self, fh):
+        import pyarrow as pa
+
+        obs = json.loads(fh.getvalue())
+        self.assertEqual(obs['encoding'], 'arrow')
+        return pa.ipc.open_stream(base64.b64decode(obs['data'])).read_all()
+
+    def test_write_arrow(self):
+        fh = io.StringIO()
+        _write_arrow(fh, self.df)
+        obs = self._read_arrow(fh)
+
+        self.assertEqual(obs.to_pylist(),
+                         json.loads(self.df.to_json(orient='records')))
+
+    def test_write_arrow_integers_as_doubles(self):
+        self.df['count'] = [1, 2, 3]
+
+        fh = io.StringIO()
+        _write_arrow(fh, self.df)
+        obs = self._read_arrow(fh)
+
+        self.assertEqual(str(obs.schema.field('count').type), 'double')
+        self.assertEqual(obs.column('count').to_pylist(), [1.0, 2.0, 3.0])
+
+    def test_write_arrow_missing_pyarrow(self):
+        with mock.patch.dict('sys.modules', {'pyarrow': None}):
+            with self.assertRaisesRegex(ImportError, 'requires.*pyarrow'):
+                _write_arrow(io.StringIO(), self.df)
+
+
+class TestWriteSpec(TestBase):
+    def test_write_spec_matches_round_trip(self):
+        fh = io.StringIO()
+        _write_spec(fh, _SpecTemplate(self.json_obj), metadata=self.df,
+                    md_ids='sample-id')
+
+        exp = _json_replace(
+            self.json_obj, md_ids='sample-id',
+            metadata=json.loads(self.df.to_json(orient='records')))
+
+        self.assertEqual(json.loads(fh.getvalue()), exp)
+
+    def test_write_spec_multiple_frames(self):
+        self.json_obj['data'].append(
+            {'name': 'averaged',
+             'values': {'{{REPLACE_PARAM}}': 'averaged_metadata'}})
+
+        fh = io.StringIO()
+        _write_spec(fh, _SpecTemplate(self.json_obj), metadata=self.df,
+                    averaged_metadata=self.df.iloc[:1], md_ids='sample-id')
+        obs = json.loads(fh.getvalue())
+
+        self.assertEqual(len(obs['data'][0]['values']), 3)
+        self.assertEqual(obs['data'][1]['values'],
+                         [{'sample-id': 'sample1', 'numeric-col': 1.0,
+                           'categorical-col': 'foo'}])
+
+    def test_write_spec_marker_like_strings(self):
+        # strings that look like the markers the datasets are written in
+        # place of are left as they are
+        for md_ids in ('{{DATA_PARAM:metadata}}', '{{DATA_PARAM:other}}'):
+            with self.subTest(md_ids=md_ids):
+                fh = io.StringIO()
+                _write_spec(fh, _SpecTemplate(self.json_obj),
+                            metadata=self.df, md_ids=md_ids)
+                obs = json.loads(fh.getvalue())
+
+                self.assertEqual(obs['signals'][0]['value'], md_ids)
+                self.assertEqual(len(obs['data'][0]['values']), 3)
+
+    def test_write_spec_columns_encoding(self):
+        fh = io.StringIO()
+        _write_spec(fh, _SpecTemplate(self.json_obj), data_encoding='columns',
+                    metadata=self.df, md_ids='sample-id')
+        obs = json.loads(fh.getvalue())
+
+        # rebuild the records the same way `common/decode.js` does
+        columns = obs['data'][0]['values']['data']
+        records = [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+        self.assertEqual(records,
+                         json.loads(self.df.to_json(orient='records')))
+        self.assertEqual(obs['signals'][0]['value'], 'sample-id')
+
+
+class TestWriteSidecars(TestBase):
+    def test_write_sidecars(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            obs = _write_sidecars(output_dir, _SpecTemplate(self.json_obj),
+                                  {'metadata': self.df,
+                                   'md_ids': 'sample-id'})
+
+            with open(os.path.join(output_dir, 'data',
+                                   'metadata.json')) as fh:
+                records = json.load(fh)
+
+        self.assertEqual(obs['data'], [{'name': 'table',
+                                        'url': 'data/metadata.json',
+                                        'format': {'type': 'json'}}])
+        self.assertEqual(obs['signals'][0]['value'], 'sample-id')
+        self.assertEqual(records,
+                         json.loads(self.df.to_json(orient='records')))
+
+        # the template itself is left as-is
+        self.assertEqual(self.json_obj['data'][0],
+                         {'name': 'table',
+                          'values': {'{{REPLACE_PARAM}}': 'metadata'}})
+
+    def test_write_sidecars_not_a_dataset(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            with self.assertRaisesRegex(ValueError,
+                                        'Only vega datasets.*md_ids'):
+                _write_sidecars(output_dir, _SpecTemplate(self.json_obj),
+                                {'metadata': self.df, 'md_ids': self.df})
+
+
+class TestWriteChunks(TestBase):
+    def test_write_chunks(self):
+        fh = io.StringIO()
+        _write_chunks(fh, {'metadata': self.df}, chunksize=2)
+
+        blocks = re.findall(r'<script type="application/json"'
+                            r' id="(.*?)">(.*?)</script>', fh.getvalue())
+        self.assertEqual([id_ for id_, _ in blocks],
+                         ['chunk-metadata-0', 'chunk-metadata-1'])
+        self.assertEqual(
+            [record for _, block in blocks for record in json.loads(block)],
+            json.loads(self.df.to_json(orient='records')))
+
+    def test_write_chunks_interleaved(self):
+        fh = io.StringIO()
+        _write_chunks(fh, {'metadata': self.df,
+                           'averaged': self.df.iloc[:2]}, chunksize=2)
+
+        # in the order that the browser inserts them
+        ids = re.findall(r'id="(.*?)"', fh.getvalue())
+        self.assertEqual(ids, ['chunk-metadata-0', 'chunk-averaged-0',
+                               'chunk-metadata-1'])
+
+    def test_chunked_frames(self):
+        values = {'metadata': self.df, 'md_ids': 'sample-id'}
+        frames = _chunked_frames(values, chunksize=2)
+
+        self.assertIs(frames['metadata'], self.df)
+        self.assertEqual(values, {'metadata': {'encoding': 'chunked',
+                                               'param': 'metadata',
+                                               'chunks': 2},
+                                  'md_ids': 'sample-id'})
+
+
+class TestChooseRenderer(TestPluginBase):
+    package = 'q2_vizard.tests'
+
+    def test_choose_renderer_auto(self):
+        self.assertEqual(_choose_renderer('auto', _CANVAS_MARK_THRESHOLD),
+                         'svg')
+        self.assertEqual(
+            _choose_renderer('auto', _CANVAS_MARK_THRESHOLD + 1), 'canvas')
+        self.assertEqual(_choose_renderer(None, 0), 'svg')
+
+    def test_choose_renderer_override(self):
+        self.assertEqual(_choose_renderer('svg', 10 ** 6), 'svg')
+        self.assertEqual(_choose_renderer('canvas', 1), 'canvas')
+
+
+class TestLoadAssets(TestPluginBase):
+    package = 'q2_vizard.tests'
+
+    def setUp(self):
+        super().setUp()
+        _clear_asset_cache()
+
+    def tearDown(self):
+        _clear_asset_cache()
+        super().tearDown()
+
+    def test_assets_cached(self):
+        index1, template1 = _load_assets('heatmap')
+        index2, template2 = _load_assets('heatmap')
+
+        self.assertIs(index1, index2)
+        self.assertIs(template1, template2)
+        self.assertIn('gradient_measure', template1.params)
+
+    def test_assets_keyed_by_spec(self):
+        _, horizontal = _load_assets('boxplot', 'horizontalSpec.json')
+        _, vertical = _load_assets('boxplot', 'verticalSpec.json')
+
+        self.assertIsNot(horizontal, vertical)
+        self.assertEqual(
+            set(_SPEC_CACHE),
+            {('boxplot', 'horizontalSpec.json'),
+             ('boxplot', 'verticalSpec.json')})
+
+    def test_assets_reloaded_when_stale(self):
+        _, template = _load_assets('lineplot')
+
+        # pretend the spec file was modified after it was cached
+        key = ('lineplot', 'spec.json')
+        spec_fp, mtime, _ = _SPEC_CACHE[key]
+        _SPEC_CACHE[key] = (spec_fp, mtime - 1, template)
+
+        with mock.patch.dict(os.environ, {_RELOAD_ASSETS_ENV_VAR: '0'}):
+            _, obs = _load_assets('lineplot')
+        self.assertIs(obs, template)
+
+        with mock.patch.dict(os.environ, {_RELOAD_ASSETS_ENV_VAR: '1'}):
+            _, obs = _load_assets('lineplot')
+        self.assertIsNot(obs, template)
+        self.assertEqual(obs.json_obj, template.json_obj)
@@ -8,13 +8,16 @@
 
 import os
 import tempfile
+import importlib.util
+from unittest import mock
+
 import pandas as pd
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
-from selenium.webdriver.support.ui import Select
+from selenium.webdriver.support.ui import Select, WebDriverWait
 
 from qiime2 import Metadata
 from qiime2.plugin.testing import TestPluginBase
@@ -52,6 +55,23 @@ class TestScatterplot(TestPluginBase):
              'sample1', 'A', 'A', 'legendDefault')
         ]
 
+    def test_columns_without_numeric_error(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            with self.assertRaisesRegex(
+                ValueError, 'None of the provided `columns` are numeric'
+            ):
+                scatterplot_2d(output_dir=output_dir, metadata=self.md,
+                               columns=['foobar', 'bodysite'])
+
+    def test_metadata_without_numeric_error(self):
+        md = Metadata(self.md.to_dataframe()[['foobar', 'bodysite']])
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with self.assertRaisesRegex(
+                ValueError, 'The Metadata has no numeric columns'
+            ):
+                scatterplot_2d(output_dir=output_dir, metadata=md)
+
     # utility method that will run all checks for scatterplot
     # used in each browser test below (firefox & chrome supported)
     def _selenium_scatterplot_test(self, driver, x_measure, y_measure,
@@ -175,3 +195,93 @@ class TestScatterplot(TestPluginBase):
                         driver, x_measure, y_measure, color_measure,
                         exp_marks_len, exp_x_mark, exp_y_mark, exp_mark_id,
                         exp_x_measure, exp_y_measure, exp_color_measure)
+
+    # the data is inserted into the view a few records at a time
+    def _selenium_chunked_test(self, driver):
+        with tempfile.TemporaryDirectory() as output_dir, \
+                mock.patch('q2_vizard._render._PROGRESSIVE_CHUNKSIZE', 2):
+            scatterplot_2d(output_dir=output_dir, metadata=self.md,
+                           x_measure='B', y_measure='Z',
+                           data_encoding='chunked')
+
+            driver.get(f"file://{os.path.join(output_dir, 'index.html')}")
+
+            # each chunk block is removed once it's been inserted, and the
+            # progress indicator once they all have been
+            WebDriverWait(driver, 10).until(
+                lambda driver: not driver.find_elements(
+                    By.CSS_SELECTOR, 'script[id^="chunk-"], #progress'))
+
+            mark_elements = \
+                driver.find_elements(By.CSS_SELECTOR,
+                                     'g.mark-symbol.role-mark.marks > path')
+            self.assertEqual(len(mark_elements), self.md.id_count)
+            self.assertEqual(
+                sorted(mark.get_attribute('data-id')
+                       for mark in mark_elements),
+                sorted(self.md.to_dataframe().index))
+
+    def test_scatterplot_chunked_chrome(self):
+        chrome_options = ChromeOptions()
+        chrome_options.add_argument('-headless')
+
+        with webdriver.Chrome(options=chrome_options) as driver:
+            self._selenium_chunked_test(driver)
+
+    def test_scatterplot_chunked_firefox(self):
+        firefox_options = FirefoxOptions()
+        firefox_options.add_argument('-headless')
+
+        with webdriver.Firefox(options=firefox_options) as driver:
+            self._selenium_chunked_test(driver)
+
+    # the data is embedded encoded, and decoded by the page before it's drawn
+    def _selenium_data_encoding_test(self, driver, data_encoding):
+        with tempfile.TemporaryDirectory() as output_dir:
+            scatterplot_2d(output_dir=output_dir, metadata=self.md,
+                           x_measure='B', y_measure='Z',
+                           data_encoding=data_encoding)
+
+            driver.get(f"file://{os.path.join(output_dir, 'index.html')}")
+
+            # the marks are annotated once the decoded data is drawn
+            WebDriverWait(driver, 10).until(
+                lambda driver: driver.find_elements(
+                    By.CSS_SELECTOR, 'g.mark-symbol.role-mark.marks > path'
+                                     '[data-id]'))
+
+            mark_elements = \
+                driver.find_elements(By.CSS_SELECTOR,
+                                     'g.mark-symbol.role-mark.marks > path')
+            self.assertEqual(len(mark_elements), self.md.id_count)
+
+            mark_element_0 = mark_elements[0]
+            self.assertEqual(mark_element_0.get_attribute('data-id'),
+                             'sample1')
+            self.assertEqual(mark_element_0.get_attribute('data-x'), '5')
+            self.assertEqual(mark_element_0.get_attribute('data-y'), '33')
+
+    def _data_encodings(self):
+        data_encodings = ['columns', 'gzip']
+        # the `arrow` encoding needs `pyarrow` to be written
+        if importlib.util.find_spec('pyarrow'):
+            data_encodings.append('arrow')
+        return data_encodings
+
+    def test_scatterplot_data_encoding_chrome(self):
+        chrome_options = ChromeOptions()
+        chrome_options.add_argument('-headless')
+
+        with webdriver.Chrome(options=chrome_options) as driver:
+            for data_encoding in self._data_encodings():
+                with self.subTest(data_encoding=data_encoding):
+                    self._selenium_data_encoding_test(driver, data_encoding)
+
+    def test_scatterplot_data_encoding_firefox(self):
+        firefox_options = FirefoxOptions()
+        firefox_options.add_argument('-headless')
+
+        with webdriver.Firefox(options=firefox_options) as driver:
+            for data_encoding in self._data_encodings():
+                with self.subTest(data_encoding=data_encoding):
+                    self._selenium_data_encoding_test(driver, data_encoding)
@@ -0,0 +1,88 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import tempfile
+
+import pandas as pd
+
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_vizard import lineplot, boxplot
+from q2_vizard._synthetic import _synthetic_dataframe, _synthetic_metadata
+
+
+class TestSynthetic(TestPluginBase):
+    package = 'q2_vizard.tests'
+
+    def test_shape(self):
+        obs = _synthetic_dataframe(100, n_numeric=3, n_categorical=2,
+                                   cardinality=[2, 7])
+
+        self.assertEqual(obs.shape, (100, 5))
+        self.assertEqual(obs.index.name, 'id')
+        self.assertEqual(obs.index[-1], 'sample99')
+        self.assertTrue(obs.index.is_unique)
+        self.assertEqual(obs['categorical0'].nunique(), 2)
+        self.assertEqual(obs['categorical1'].nunique(), 7)
+
+        md = _synthetic_metadata(100, n_numeric=3, n_categorical=2)
+        self.assertEqual(
+            [props.type for props in md.columns.values()],
+            ['numeric'] * 3 + ['categorical'] * 2)
+
+    def test_deterministic(self):
+        params = dict(replicates=2, missing_rate=0.1, skew=1.0,
+                      outlier_rate=0.05)
+
+        pd.testing.assert_frame_equal(_synthetic_dataframe(500, **params),
+                                      _synthetic_dataframe(500, **params))
+        self.assertFalse(_synthetic_dataframe(500, seed=1).equals(
+            _synthetic_dataframe(500, seed=2)))
+
+    def test_cardinality_per_column(self):
+        with self.assertRaisesRegex(ValueError, 'each of the 2 categorical'):
+            _synthetic_dataframe(10, cardinality=[1, 2, 3])
+
+    def test_replicates(self):
+        obs = _synthetic_dataframe(3000, replicates=3)
+        per_timepoint = obs.groupby(['categorical0', 'timepoint']).size()
+
+        # every timepoint but (maybe) the last of each group has 3 samples
+        self.assertEqual(per_timepoint.max(), 3)
+        self.assertLessEqual((per_timepoint < 3).sum(), 5)
+
+        obs = _synthetic_dataframe(3000, replicates=1)
+        self.assertFalse(
+            obs.duplicated(subset=['categorical0', 'timepoint']).any())
+
+    def test_missing_rate(self):
+        obs = _synthetic_dataframe(10000, missing_rate=0.2)
+
+        for rate in obs.isna().mean():
+            self.assertAlmostEqual(rate, 0.2, delta=0.02)
+
+    def test_skew_and_outliers(self):
+        normal = _synthetic_dataframe(10000)['numeric0']
+        skewed = _synthetic_dataframe(10000, skew=1.0)['numeric0']
+
+        self.assertLess(abs(normal.skew()), 0.2)
+        self.assertGreater(skewed.skew(), 2)
+
+        values = _synthetic_dataframe(10000, outlier_rate=0.01)['numeric0']
+        outliers = (values - values.median()).abs() > 8 * normal.std()
+        self.assertAlmostEqual(outliers.mean(), 0.01, delta=0.003)
+
+    def test_renders(self):
+        md = _synthetic_metadata(2000, replicates=1, missing_rate=0.05,
+                                 outlier_rate=0.01)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            lineplot(output_dir, md, x_measure='timepoint',
+                     y_measure='numeric0', group_by='categorical0')
+            boxplot(output_dir, md, distribution_measure='numeric0',
+                    group_by='categorical1')
@@ -6,12 +6,16 @@
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
 
+from unittest import mock
+
 import pandas as pd
 
 from qiime2.plugin.testing import TestPluginBase
 from qiime2 import Metadata
 
-from .._util import _col_type_validation, _measure_validation
+from .._util import (_SpecTemplate, _column_schema, _col_type_validation,
+                     _measure_validation, _restrict_columns,
+                     _project_columns)
 
 
 class TestBase(TestPluginBase):
@@ -32,6 +36,34 @@ class TestBase(TestPluginBase):
                                                  'No.']))
 
 
+class TestColumnSchema(TestBase):
+    def test_column_schema(self):
+        schema = _column_schema(self.md)
+
+        self.assertEqual(schema.types, {'numeric-col': 'numeric',
+                                        'categorical-col': 'categorical',
+                                        'No.': 'numeric'})
+        self.assertIn('No.', schema)
+        self.assertNotIn('boo', schema)
+        self.assertEqual(schema.of_type('numeric'), ['numeric-col', 'No.'])
+        self.assertEqual(schema.of_type('categorical'), ['categorical-col'])
+
+    def test_column_schema_reused(self):
+        schema = _column_schema(self.md)
+
+        self.assertIs(_column_schema(schema), schema)
+
+    def test_validation_does_not_build_dataframe(self):
+        with mock.patch.object(Metadata, 'to_dataframe') as to_dataframe:
+            _measure_validation(metadata=self.md, measure='numeric-col')
+            _col_type_validation(metadata=self.md, measure='numeric-col',
+                                 col_type='numeric')
+            _restrict_columns(self.md, ['numeric-col'], ['categorical-col'],
+                              [])
+
+        to_dataframe.assert_not_called()
+
+
 class TestMeasureValidation(TestBase):
     def test_measure_not_in_metadata(self):
         with self.assertRaisesRegex(ValueError, '`boo` not found as a column'):
@@ -56,3 +88,107 @@ class TestColTypeValidation(TestBase):
         ):
             _col_type_validation(metadata=self.md, measure='numeric-col',
                                  col_type='categorical')
+
+
+class TestRestrictColumns(TestBase):
+    def test_no_columns(self):
+        obs = _restrict_columns(self.md, ['numeric-col', 'No.'], None, [])
+
+        self.assertEqual(obs, ['numeric-col', 'No.'])
+
+    def test_columns_keep_measures(self):
+        obs = _restrict_columns(self.md, ['numeric-col', 'No.'],
+                                ['categorical-col'], ['numeric-col', None])
+
+        self.assertEqual(obs, ['numeric-col'])
+
+    def test_column_not_in_metadata(self):
+        with self.assertRaisesRegex(ValueError, '`boo` not found as a column'):
+            _restrict_columns(self.md, ['numeric-col'], ['boo'], [])
+
+
+class TestProjectColumns(TestBase):
+    def test_project_columns(self):
+        md = self.md.to_dataframe().reset_index()
+        obs = _project_columns(md, 'sample-id', 'No.', 'sample-id',
+                               'numeric-col', 'No.')
+
+        self.assertEqual(list(obs.columns),
+                         ['sample-id', 'No.', 'numeric-col'])
+        self.assertEqual(len(obs), 3)
+
+
+class TestSpecTemplate(TestPluginBase):
+    package = 'q2_vizard.tests'
+
+    def setUp(self):
+        super().setUp()
+        self.json_obj = {
+            'title': {'text': {'signal': 'title'}},
+            'signals': [
+                {'name': 'title',
+                 'value': {'{{REPLACE_PARAM}}': 'title'}},
+                {'name': 'xField',
+                 'value': {'{{REPLACE_PARAM}}': 'x_measure'},
+                 'bind': {'input': 'select',
+                          'options': {'{{REPLACE_PARAM}}': 'columns'}}}
+            ],
+            'data': [{'name': 'table',
+                      'values': {'{{REPLACE_PARAM}}': 'metadata'}}]
+        }
+
+    def test_slots(self):
+        template = _SpecTemplate(self.json_obj)
+
+        self.assertEqual(template.slots, [
+            (('signals', 0, 'value'), 'title'),
+            (('signals', 1, 'value'), 'x_measure'),
+            (('signals', 1, 'bind', 'options'), 'columns'),
+            (('data', 0, 'values'), 'metadata')
+        ])
+        self.assertEqual(template.params,
+                         {'title', 'x_measure', 'columns', 'metadata'})
+
+    def test_fill(self):
+        template = _SpecTemplate(self.json_obj)
+        obs = template.fill(title='foo', x_measure='x', columns=['x', 'y'],
+                            metadata=[{'x': 1}])
+
+        self.assertEqual(obs['signals'][0]['value'], 'foo')
+        self.assertEqual(obs['signals'][1]['value'], 'x')
+        self.assertEqual(obs['signals'][1]['bind'],
+                         {'input': 'select', 'options': ['x', 'y']})
+        self.assertEqual(obs['data'][0]['values'], [{'x': 1}])
+
+        # subtrees without slots are shared, and the template is untouched
+        self.assertIs(obs['title'], self.json_obj['title'])
+        self.assertEqual(self.json_obj['signals'][0]['value'],
+                         {'{{REPLACE_PARAM}}': 'title'})
+
+    def test_fill_values_not_searched(self):
+        template = _SpecTemplate(self.json_obj)
+        value = {'{{REPLACE_PARAM}}': 'x_measure'}
+        obs = template.fill(title=value, x_measure='x', columns=[],
+                            metadata=[])
+
+        self.assertIs(obs['signals'][0]['value'], value)
+
+    def test_fill_missing_param(self):
+        template = _SpecTemplate(self.json_obj)
+
+        with self.assertRaisesRegex(KeyError, 'metadata'):
+            template.fill(title='foo', x_measure='x', columns=[])
+
+    def test_derived(self):
+        template = _SpecTemplate(self.json_obj)
+        derive = mock.Mock(side_effect=lambda template: _SpecTemplate(
+            {'title': template.json_obj['title']}))
+
+        obs = template.derived(derive)
+
+        # derived once, and kept on the template rather than elsewhere
+        self.assertIs(template.derived(derive), obs)
+        derive.assert_called_once_with(template)
+        self.assertEqual(obs.json_obj,
+                         {'title': {'text': {'signal': 'title'}}})
+        self.assertIsNot(_SpecTemplate(self.json_obj).derived(derive), obs)
@@ -0,0 +1,126 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2023-2024, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import base64
+import hashlib
+import tempfile
+from unittest import mock
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+
+from qiime2 import Metadata
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_vizard import scatterplot_2d
+from q2_vizard._vendor import (_runtime_scripts, _vendor_assets_dir,
+                               _VEGA_RUNTIME, _ARROW_RUNTIME)
+
+
+class TestRuntimeScripts(TestPluginBase):
+    package = 'q2_vizard.tests'
+
+    def setUp(self):
+        super().setUp()
+
+        self.vendor_dir = tempfile.TemporaryDirectory()
+        self.patcher = mock.patch('q2_vizard._vendor._vendor_assets_dir',
+                                  return_value=self.vendor_dir.name)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.vendor_dir.cleanup()
+        super().tearDown()
+
+    def test_runtime_scripts_from_cdn(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            obs = _runtime_scripts(output_dir)
+
+            self.assertEqual(os.listdir(output_dir), [])
+
+        self.assertEqual(obs, [
+            ('https://cdn.jsdelivr.net/npm/vega@5.22.1/build/vega.min.js',
+             'sha256-cx8BtoEWvBhaGWMiCWyjQnN0JMSZXEimZ09X68ln6cE='),
+            ('https://cdn.jsdelivr.net/npm/vega-embed@6.20.8/build/'
+             'vega-embed.min.js',
+             'sha256-5ckpBPG2FOVKaoYOzxlMqIv5SLT663r5oP4srZPccw4=')])
+
+    def test_runtime_scripts_vendored(self):
+        for script in _VEGA_RUNTIME:
+            with open(os.path.join(self.vendor_dir.name,
+                                   script.filename), 'w') as fh:
+                fh.write(f'// {script.package}')
+            with open(os.path.join(self.vendor_dir.name,
+                                   script.license_filename), 'w') as fh:
+                fh.write(f'{script.package} license')
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            obs = _runtime_scripts(output_dir, data_encoding='arrow')
+
+            with open(os.path.join(output_dir, 'vendor',
+                                   'vega-5.22.1.min.js')) as fh:
+                self.assertEqual(fh.read(), '// vega')
+            with open(os.path.join(output_dir, 'vendor',
+                                   'vega-5.22.1.LICENSE')) as fh:
+                self.assertEqual(fh.read(), 'vega license')
+
+        # in load order, with arrow (which isn't vendored) from the CDN
+        self.assertEqual(obs, [('vendor/vega-5.22.1.min.js', None),
+                               ('vendor/vega-embed-6.20.8.min.js', None),
+                               (_ARROW_RUNTIME[0].url, None)])
+
+
+class TestOffline(TestPluginBase):
+    package = 'q2_vizard.tests'
+
+    def setUp(self):
+        super().setUp()
+
+        self.md = Metadata.load(self.get_data_path('sample-md.tsv'))
+
+    def test_runtime_vendored(self):
+        # the runtime, and its license, is shipped in the package so that
+        # every visualization renders without network access
+        for script in _VEGA_RUNTIME:
+            for filename in (script.filename, script.license_filename):
+                self.assertTrue(os.path.isfile(
+                    os.path.join(_vendor_assets_dir(), filename)),
+                    f'{filename} has not been vendored (see `make vendor`)')
+
+    def test_runtime_integrity(self):
+        # the vendored copies are the files pinned for the CDN
+        for script in _VEGA_RUNTIME:
+            with open(os.path.join(_vendor_assets_dir(),
+                                   script.filename), 'rb') as fh:
+                digest = base64.b64encode(
+                    hashlib.sha256(fh.read()).digest()).decode()
+            self.assertEqual(f'sha256-{digest}', script.integrity)
+
+    def test_offline_chrome(self):
+        chrome_options = ChromeOptions()
+        chrome_options.add_argument('-headless')
+
+        with webdriver.Chrome(options=chrome_options) as driver, \
+                tempfile.TemporaryDirectory() as output_dir:
+            driver.set_network_conditions(offline=True, latency=0,
+                                          download_throughput=0,
+                                          upload_throughput=0)
+
+            scatterplot_2d(output_dir=output_dir, metadata=self.md,
+                           x_measure='x', y_measure='y')
+
+            driver.get(f"file://{os.path.join(output_dir, 'index.html')}")
+
+            mark_elements = \
+                driver.find_elements(By.CSS_SELECTOR,
+                                     'g.mark-symbol.role-mark.marks > path')
+            self.assertEqual(len(mark_elements),
+                             len(self.md.to_dataframe()))
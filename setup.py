@@ -13,15 +13,19 @@ import versioneer
 setup(
     name='q2-vizard',
     version=versioneer.get_version(),
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
     package_data={
         'q2_vizard': [
             'tests/data/*',
             'assets/*',
+            'assets/common/*',
+            'assets/vendor/*',
             'assets/lineplot/*',
             'assets/heatmap/*',
             'assets/scatterplot_2d/*',
-            'assets/boxplot/*'],
+            'assets/boxplot/*',
+            'assets/batch/*',
+            'assets/dashboard/*'],
     },
     author='Liz Gehret',
     author_email='elizabeth.gehret@nau.edu',